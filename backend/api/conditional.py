@@ -0,0 +1,82 @@
+"""
+ETag и Last-Modified для условных GET-запросов.
+
+Версии считаются без сериализации ответа: для ингредиентов это версия
+файла индекса автодополнения, для тегов — хеш строк таблицы, для
+рецепта — updated_at плюс флаги избранного, корзины и подписки
+текущего пользователя одним запросом.
+
+В ответе рецепта есть и связанные строки: автор, теги, ингредиенты.
+Их сохранение и удаление сдвигает updated_at рецептов через сигналы
+(api.signals.touch_recipes), поэтому отдельные версии в ключ не
+входят. QuerySet.update() по тегам, ингредиентам и пользователям
+сигналов не шлёт и версию рецептов не меняет.
+"""
+from hashlib import md5
+
+from django.db.models import Exists, OuterRef
+
+from recipes.models import Favorite, Recipe, ShoppingCart, Tag
+from users.models import Subscribe
+from .ingredient_index import ingredient_index
+
+
+def tags_etag(request, *args, **kwargs):
+    rows = Tag.objects.order_by('id').values_list(
+        'id', 'name', 'color', 'slug'
+    )
+    return md5(repr(list(rows)).encode()).hexdigest()
+
+
+def ingredients_etag(request, *args, **kwargs):
+    return ingredient_index.version()[0]
+
+
+def ingredients_last_modified(request, *args, **kwargs):
+    return ingredient_index.version()[1]
+
+
+def recipe_version(request, pk):
+    """Версия рецепта для пользователя; кешируется на время запроса."""
+    if not hasattr(request, '_recipe_version'):
+        user = request.user
+        recipes = Recipe.objects.filter(pk=pk)
+        fields = ['updated_at']
+        if user.is_authenticated:
+            recipes = recipes.annotate(
+                is_favorited=Exists(
+                    Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+                ),
+                is_in_shopping_cart=Exists(
+                    ShoppingCart.objects.filter(
+                        user=user, recipe=OuterRef('pk')
+                    )
+                ),
+                is_subscribed=Exists(
+                    Subscribe.objects.filter(
+                        user=user, author=OuterRef('author')
+                    )
+                ),
+            )
+            fields += ['is_favorited', 'is_in_shopping_cart', 'is_subscribed']
+        request._recipe_version = recipes.values_list(*fields).first()
+    return request._recipe_version
+
+
+def recipe_etag(request, pk=None, *args, **kwargs):
+    version = recipe_version(request, pk)
+    if version is None:
+        return None
+    user = request.user.pk or 0
+    return md5(f'{user}:{version}'.encode()).hexdigest()
+
+
+def recipe_last_modified(request, pk=None, *args, **kwargs):
+    """
+    Last-Modified отдаётся только анонимам: у авторизованных ответ
+    зависит ещё и от флагов, которые не меняют updated_at.
+    """
+    version = recipe_version(request, pk)
+    if version is None or request.user.is_authenticated:
+        return None
+    return version[0]
@@ -0,0 +1,146 @@
+import binascii
+import hashlib
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from PIL import Image, UnidentifiedImageError
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+
+BASE64_CHUNK = 64 * 1024
+IMAGE_FORMATS = {
+    'JPEG': 'jpg',
+    'PNG': 'png',
+    'WEBP': 'webp',
+    'GIF': 'gif',
+}
+
+
+class ContentHashImageField(serializers.ImageField):
+    """
+    Изображение в base64 (data URI). Строка декодируется частями во
+    временный файл, размеры проверяются по заголовку до декодирования
+    пикселей, слишком большие изображения уменьшаются. Файл
+    сохраняется под именем из SHA-256 содержимого, поэтому повторная
+    загрузка той же фотографии не создаёт новый файл.
+    """
+
+    default_error_messages = {
+        'invalid': 'Ожидается изображение в формате data:image/...;base64.',
+        'invalid_image': 'Загрузите корректное изображение.',
+        'too_large': 'Размер изображения не может превышать {max_bytes} байт.',
+        'too_many_pixels': (
+            'Изображение не может содержать больше {max_pixels} пикселей.'
+        ),
+    }
+
+    def __init__(self, upload_to='recipes/', **kwargs):
+        self.upload_to = upload_to
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) and data.startswith('http'):
+            raise SkipField()
+        if not isinstance(data, str) or not data.startswith('data:'):
+            self.fail('invalid')
+        start = data.find(';base64,')
+        if start == -1:
+            self.fail('invalid')
+        with tempfile.TemporaryFile() as file:
+            digest = self.decode(data, start + len(';base64,'), file)
+            return self.store(file, digest)
+
+    def decode(self, data, start, file):
+        """Декодирует base64 в file частями; возвращает SHA-256."""
+        max_bytes = settings.RECIPE_IMAGE_MAX_BYTES
+        digest = hashlib.sha256()
+        size = 0
+        carry = ''
+        for offset in range(start, len(data), BASE64_CHUNK):
+            chunk = carry + ''.join(data[offset:offset + BASE64_CHUNK].split())
+            usable = len(chunk) - len(chunk) % 4
+            carry = chunk[usable:]
+            try:
+                block = binascii.a2b_base64(chunk[:usable])
+            except binascii.Error:
+                self.fail('invalid')
+            size += len(block)
+            if size > max_bytes:
+                self.fail('too_large', max_bytes=max_bytes)
+            digest.update(block)
+            file.write(block)
+        if carry or not size:
+            self.fail('invalid')
+        return digest.hexdigest()
+
+    def open_image(self, file):
+        file.seek(0)
+        try:
+            image = Image.open(file)
+        except (UnidentifiedImageError, Image.DecompressionBombError):
+            self.fail('invalid_image')
+        if image.format not in IMAGE_FORMATS:
+            self.fail('invalid_image')
+        max_pixels = settings.RECIPE_IMAGE_MAX_PIXELS
+        if image.width * image.height > max_pixels:
+            self.fail('too_many_pixels', max_pixels=max_pixels)
+        return image
+
+    def downsize(self, image, file, max_side):
+        """Записывает в file копию, уменьшенную до max_side."""
+        image_format = image.format
+        if image_format == 'JPEG':
+            image.draft('RGB', (max_side, max_side))
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        image.save(file, image_format, quality=85)
+
+    def save(self, name, file):
+        file.seek(0)
+        stored = default_storage.save(name, File(file))
+        if stored != name:
+            default_storage.delete(stored)
+        return name
+
+    def store(self, file, digest):
+        image = self.open_image(file)
+        try:
+            image.verify()
+        except (OSError, SyntaxError, ValueError):
+            self.fail('invalid_image')
+        name = f'{self.upload_to}{digest}.{IMAGE_FORMATS[image.format]}'
+        if default_storage.exists(name):
+            return name
+        max_side = settings.RECIPE_IMAGE_MAX_SIDE
+        if max(image.size) > max_side:
+            with tempfile.TemporaryFile() as resized:
+                self.downsize(self.open_image(file), resized, max_side)
+                return self.save(name, resized)
+        return self.save(name, file)
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    URL вариантов фотографии рецепта. Пока вариант не построен,
+    вместо него отдаётся URL оригинала.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        if not recipe.image:
+            return None
+        request = self.context.get('request')
+        storage = recipe.image.storage
+        ready = recipe.image_variants or {}
+        urls = {}
+        for variant in settings.RECIPE_IMAGE_VARIANTS:
+            name = ready.get(variant)
+            url = storage.url(name) if name else recipe.image.url
+            urls[variant] = (
+                request.build_absolute_uri(url) if request else url
+            )
+        return urls
@@ -1,6 +1,7 @@
 from django_filters import rest_framework as filters
 
 from recipes.models import Ingredient, Recipe
+from recipes.search import search_recipes
 
 
 class IngredientFilter(filters.FilterSet):
@@ -22,6 +23,7 @@ class RecipeFilter(filters.FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Recipe
@@ -30,6 +32,7 @@ class RecipeFilter(filters.FilterSet):
             'tags',
             'is_favorited',
             'is_in_shopping_cart',
+            'search',
         )
 
     def filter_is_favorited(self, queryset, name, value):
@@ -39,3 +42,6 @@ class RecipeFilter(filters.FilterSet):
     def filter_is_in_shopping_cart(self, queryset, name, value):
         if value:
             return queryset.filter(shoppingcart__user=self.request.user)
+
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
@@ -0,0 +1,197 @@
+"""
+Индекс для автодополнения ингредиентов.
+
+Индекс хранится в файле, отсортированном по приведённому к нижнему
+регистру названию, и читается через mmap, поэтому все воркеры gunicorn
+используют одну копию из page cache. Файл пересобирается целиком и
+атомарно подменяется через os.replace; воркеры замечают подмену по
+os.stat и переоткрывают его.
+
+Формат файла::
+
+    MAGIC | count (uint32) | offsets (count * uint32) | records
+
+Каждая запись имеет вид ``key \\x1f id \\x1f name \\x1f unit \\n``.
+"""
+import os
+import struct
+import tempfile
+import threading
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timezone
+from mmap import ACCESS_READ, mmap
+
+from django.conf import settings
+from django.db import transaction
+
+from recipes.models import Ingredient
+
+MAGIC = b'CCIX'
+HEADER = struct.Struct('<4sI')
+SEPARATOR = b'\x1f'
+END = b'\n'
+
+
+def normalize(value):
+    return value.casefold().strip()
+
+
+class IngredientIndex:
+    """Поиск ингредиентов по префиксу, затем по подстроке."""
+
+    def __init__(self, path=None):
+        self._path = path
+        self._lock = threading.Lock()
+        self._state = None
+        self._stamp = None
+
+    @property
+    def path(self):
+        return self._path or settings.INGREDIENT_INDEX_PATH
+
+    def rebuild(self):
+        """Пересобирает файл индекса из базы данных."""
+        rows = sorted(
+            (normalize(name), pk, name, unit)
+            for pk, name, unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        )
+        offsets = array('I')
+        records = bytearray()
+        for key, pk, name, unit in rows:
+            offsets.append(len(records))
+            records += SEPARATOR.join((
+                key.encode(), str(pk).encode(), name.encode(), unit.encode()
+            )) + END
+        data_start = HEADER.size + offsets.itemsize * len(offsets)
+        offsets = array('I', (offset + data_start for offset in offsets))
+
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(HEADER.pack(MAGIC, len(offsets)))
+                file.write(offsets.tobytes())
+                file.write(records)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def schedule_rebuild(self):
+        """
+        Пересобирает индекс один раз после коммита транзакции.
+
+        Отложенная сборка ищется среди колбэков on_commit текущего
+        соединения, а не во флаге: при откате транзакции Django
+        выбрасывает колбэк, и следующий вызов должен запланировать
+        сборку заново.
+        """
+        connection = transaction.get_connection()
+        if any(
+            entry[1] == self.rebuild for entry in connection.run_on_commit
+        ):
+            return
+        transaction.on_commit(self.rebuild)
+
+    def _load(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self.rebuild()
+            stat = os.stat(self.path)
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if stamp != self._stamp:
+                with open(self.path, 'rb') as file:
+                    buffer = mmap(file.fileno(), 0, access=ACCESS_READ)
+                magic, count = HEADER.unpack_from(buffer)
+                if magic != MAGIC:
+                    raise OSError(f'{self.path} не является индексом')
+                offsets = memoryview(buffer)[
+                    HEADER.size:HEADER.size + 4 * count
+                ].cast('I')
+                self._state = (buffer, offsets, count)
+                self._stamp = stamp
+            return self._state
+
+    def version(self):
+        """
+        Версия индекса (ETag) и время его сборки, либо (None, None),
+        если индекс недоступен.
+        """
+        try:
+            self._load()
+        except OSError:
+            return None, None
+        inode, mtime_ns, size = self._stamp
+        return (
+            f'{inode:x}-{mtime_ns:x}-{size:x}',
+            datetime.fromtimestamp(mtime_ns / 1e9, timezone.utc),
+        )
+
+    @staticmethod
+    def _record(buffer, start):
+        end = buffer.find(END, start)
+        _, pk, name, unit = buffer[start:end].decode().split('\x1f')
+        return {'id': int(pk), 'name': name, 'measurement_unit': unit}
+
+    @staticmethod
+    def _key(buffer, start):
+        return buffer[start:buffer.find(SEPARATOR, start)]
+
+    def _prefix_matches(self, buffer, offsets, count, needle, limit):
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(buffer, offsets[middle]) < needle:
+                low = middle + 1
+            else:
+                high = middle
+        results = []
+        for position in range(low, count):
+            start = offsets[position]
+            if len(results) >= limit:
+                break
+            if not self._key(buffer, start).startswith(needle):
+                break
+            results.append(self._record(buffer, start))
+        return results
+
+    def _substring_matches(self, buffer, offsets, count, needle, limit):
+        results = []
+        cursor = offsets[0] if count else len(buffer)
+        while len(results) < limit:
+            found = buffer.find(needle, cursor)
+            if found == -1:
+                break
+            start = offsets[bisect_right(offsets, found) - 1]
+            key_end = buffer.find(SEPARATOR, start)
+            if found != start and found + len(needle) <= key_end:
+                results.append(self._record(buffer, start))
+            cursor = buffer.find(END, start) + 1
+        return results
+
+    def search(self, query, limit):
+        """
+        Возвращает до ``limit`` ингредиентов: сначала те, чьё название
+        начинается с ``query``, затем содержащие его в середине.
+        Возвращает None, если индекс недоступен.
+        """
+        try:
+            buffer, offsets, count = self._load()
+        except OSError:
+            return None
+        needle = normalize(query).encode()
+        results = self._prefix_matches(buffer, offsets, count, needle, limit)
+        if needle and len(results) < limit:
+            results += self._substring_matches(
+                buffer, offsets, count, needle, limit - len(results)
+            )
+        return results
+
+
+ingredient_index = IngredientIndex()
@@ -1,6 +1,160 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from recipes.feed import timeline
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по курсору: следующая страница выбирается условием
+    по ключу сортировки, без COUNT(*) и OFFSET.
+    """
+
+    page_size = 6
+    page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def __init__(self, ordering):
+        self.ordering = ordering
+
+    @staticmethod
+    def applies_to(queryset):
+        """
+        Курсор заменяет сортировку своим ключом, поэтому queryset с
+        собственной сортировкой (поиск по релевантности) листается
+        постранично.
+        """
+        return not queryset.query.order_by
+
+    def get_page_size(self, request):
+        page_size = request.query_params.get(self.page_size_query_param)
+        if page_size and page_size.isdigit() and int(page_size) > 0:
+            return int(page_size)
+        return self.page_size
+
+    def encode_cursor(self, position):
+        position = [str(value) for value in position]
+        return urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def last_position(self):
+        return [
+            getattr(self.page[-1], field.lstrip('-'))
+            for field in self.ordering
+        ]
+
+    def decode_cursor(self, cursor, model):
+        try:
+            position = json.loads(urlsafe_b64decode(cursor.encode()))
+            if len(position) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def after(self, position):
+        """Условие «строго после position» для составного ключа."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(
+                self.after(self.decode_cursor(cursor, queryset.model))
+            )
+        page = list(queryset[:page_size + 1])
+        self.page = page[:page_size]
+        self.has_next = len(page) > page_size
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.last_position()),
+        )
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+
+class FeedPagination(KeysetPagination):
+    """
+    Курсор по ленте подписок: страница выбирается по записям FeedItem
+    (recipes.feed.timeline), а рецепты читаются по id страницы.
+    """
+
+    def __init__(self):
+        super().__init__(('-pub_date', '-id'))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        after = self.decode_cursor(cursor, queryset.model) if cursor else None
+        rows = timeline(request.user, page_size + 1, after, queryset)
+        self.rows = rows[:page_size]
+        recipes = queryset.in_bulk([recipe_id for _, recipe_id in self.rows])
+        self.page = [
+            recipes[recipe_id] for _, recipe_id in self.rows
+            if recipe_id in recipes
+        ]
+        self.has_next = len(rows) > page_size
+        return self.page
+
+    def last_position(self):
+        return self.rows[-1]
 
 
 class PageLimitPagination(PageNumberPagination):
+    """
+    Постраничная пагинация. Если view задаёт cursor_ordering, то запрос
+    с параметром cursor (пустым для первой страницы) переключает её
+    на KeysetPagination, кроме запросов с собственной сортировкой.
+    """
+
     page_size = 6
     page_size_query_param = "limit"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, 'cursor_ordering', None)
+        if (
+            ordering
+            and KeysetPagination.cursor_query_param in request.query_params
+            and KeysetPagination.applies_to(queryset)
+        ):
+            self.keyset = KeysetPagination(ordering)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
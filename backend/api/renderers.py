@@ -0,0 +1,26 @@
+from rest_framework.renderers import JSONRenderer
+
+
+class ShoppingListRenderer(JSONRenderer):
+    """
+    Рендерер для выбора формата списка покупок через ?format=.
+    Сам файл отдаёт view потоковым ответом, а ошибки
+    рендерятся как JSON.
+    """
+
+    charset = 'utf-8'
+
+
+class CSVRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class TextRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+
+class PDFRenderer(ShoppingListRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
@@ -1,9 +1,16 @@
+from django.conf import settings
+from django.db.models import Prefetch, prefetch_related_objects
 from django.db.transaction import atomic
 from django.shortcuts import get_object_or_404
 from drf_base64.fields import Base64ImageField
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
-from recipes.models import Ingredient, IngredientAmount, Recipe, Tag
+from .fields import ContentHashImageField, ImageVariantsField
+from jobs.models import Job
+from recipes import counters, feed, images, relations, shopping_list
+from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
+                            ShoppingCart, Tag)
 from .validators import (
     AmountIngredientFieldValidator,
     ColorFieldValidator,
@@ -58,10 +65,11 @@ class RecipeListShortSerializer(serializers.ModelSerializer):
     """Сериализатор для просмотра краткого рецепта"""
 
     image = Base64ImageField(required=True)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
 
 
 class RecipeListSerializer(serializers.ModelSerializer):
@@ -77,6 +85,7 @@ class RecipeListSerializer(serializers.ModelSerializer):
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     image = Base64ImageField(required=True)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
@@ -89,6 +98,7 @@ class RecipeListSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time',
         )
@@ -97,12 +107,18 @@ class RecipeListSerializer(serializers.ModelSerializer):
         user = self.context.get('request').user
         if user.is_anonymous:
             return None
+        is_favorited = getattr(recipe, 'is_favorited', None)
+        if is_favorited is not None:
+            return is_favorited
         return recipe.favorite.filter(user=user).exists()
 
     def get_is_in_shopping_cart(self, recipe):
         user = self.context.get('request').user
         if user.is_anonymous:
             return None
+        is_in_shopping_cart = getattr(recipe, 'is_in_shopping_cart', None)
+        if is_in_shopping_cart is not None:
+            return is_in_shopping_cart
         return recipe.shoppingcart.filter(user=user).exists()
 
 
@@ -110,10 +126,8 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
     """Сериализатор для создания и обновления рецептов."""
 
     ingredients = IngredientAmountAddSerializer(many=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True, queryset=Tag.objects.all()
-    )
-    image = Base64ImageField(required=True)
+    tags = serializers.ListField(child=serializers.IntegerField())
+    image = ContentHashImageField(required=True)
     cooking_time = CookingTimeRecipeFieldValidator()
 
     class Meta:
@@ -162,40 +176,150 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Теги не должны '
                                               'повторяться')
 
+        return self.resolve_references(data, ingredient_ids)
+
+    def resolve_references(self, data, ingredient_ids):
+        """
+        Находит теги и ингредиенты одним запросом на модель, сообщает
+        обо всех отсутствующих id сразу и подставляет найденные объекты.
+        """
+        tags_data = data['tags']
+        tags = Tag.objects.in_bulk(tags_data)
+        ingredients = Ingredient.objects.in_bulk(ingredient_ids)
+        errors = {}
+        missing_tags = [pk for pk in tags_data if pk not in tags]
+        if missing_tags:
+            errors['tags'] = [f'Тег {pk} не найден' for pk in missing_tags]
+        missing_ingredients = [
+            pk for pk in ingredient_ids if pk not in ingredients
+        ]
+        if missing_ingredients:
+            errors['ingredients'] = [
+                f'Ингредиент {pk} не найден' for pk in missing_ingredients
+            ]
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        data['tags'] = [tags[pk] for pk in tags_data]
+        for ingredient_data in data['ingredients']:
+            ingredient_data['ingredient'] = ingredients[
+                ingredient_data['ingredient']['id']
+            ]
         return data
 
     def set_ingredients(self, recipe, ingredients_data):
-        ingredients = list()
-
-        for ingredient_data in ingredients_data:
-            ingredient_id = ingredient_data.get('ingredient').get('id')
-            amount = ingredient_data.get('amount')
-            recipe_ingredient = IngredientAmount(
-                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+        IngredientAmount.objects.bulk_create(
+            IngredientAmount(
+                recipe=recipe,
+                ingredient=ingredient_data.get('ingredient'),
+                amount=ingredient_data.get('amount'),
             )
-            ingredients.append(recipe_ingredient)
-        IngredientAmount.objects.bulk_create(ingredients)
+            for ingredient_data in ingredients_data
+        )
 
     @atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
         recipe = Recipe.objects.create(**validated_data)
-        recipe.tags.set(tags)
+        recipe.tags.add(*tags)
         self.set_ingredients(recipe, ingredients_data)
+        counters.recipe_created(recipe)
+        feed.publish(recipe)
+        images.schedule_variants(recipe)
+        recipe.is_favorited = False
+        recipe.is_in_shopping_cart = False
         return recipe
 
+    def update_ingredients(self, recipe, ingredients_data):
+        """
+        Приводит ингредиенты рецепта к ingredients_data, трогая только
+        изменившиеся строки. Возвращает старые и новые количества
+        {ingredient_id: amount}.
+        """
+        new_amounts = {
+            ingredient.get('ingredient').id: int(ingredient.get('amount'))
+            for ingredient in ingredients_data
+        }
+        rows = {
+            ingredient_id: (row_id, amount)
+            for row_id, ingredient_id, amount in IngredientAmount.objects
+            .filter(recipe=recipe)
+            .values_list('id', 'ingredient_id', 'amount')
+        }
+        old_amounts = {
+            ingredient_id: amount
+            for ingredient_id, (_, amount) in rows.items()
+        }
+        removed = [
+            row_id for ingredient_id, (row_id, _) in rows.items()
+            if ingredient_id not in new_amounts
+        ]
+        changed = [
+            IngredientAmount(id=rows[ingredient_id][0], amount=amount)
+            for ingredient_id, amount in new_amounts.items()
+            if ingredient_id in rows and rows[ingredient_id][1] != amount
+        ]
+        added = [
+            IngredientAmount(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in new_amounts.items()
+            if ingredient_id not in rows
+        ]
+        if removed:
+            IngredientAmount.objects.filter(id__in=removed).delete()
+        if changed:
+            IngredientAmount.objects.bulk_update(changed, ('amount',))
+        if added:
+            IngredientAmount.objects.bulk_create(added)
+        return old_amounts, new_amounts
+
+    def update_tags(self, recipe, tags):
+        """Добавляет и удаляет только изменившиеся теги."""
+        old_ids = set(recipe.tags.values_list('id', flat=True))
+        new_ids = {tag.id for tag in tags}
+        if old_ids - new_ids:
+            recipe.tags.remove(*(old_ids - new_ids))
+        if new_ids - old_ids:
+            recipe.tags.add(*(new_ids - old_ids))
+        return old_ids != new_ids
+
     @atomic
     def update(self, instance, validated_data):
         recipe = instance
         ingredients = validated_data.pop('ingredients', [])
         tags = validated_data.pop('tags')
-        IngredientAmount.objects.filter(recipe=recipe).delete()
-        recipe.tags.set(tags)
-        self.set_ingredients(recipe, ingredients)
-        return super().update(recipe, validated_data)
+        if validated_data.get('image') == recipe.image.name:
+            validated_data.pop('image')
+        old_amounts, new_amounts = self.update_ingredients(
+            recipe, ingredients
+        )
+        shopping_list.change_recipe(recipe.id, old_amounts, new_amounts)
+        tags_changed = self.update_tags(recipe, tags)
+        if 'image' in validated_data:
+            validated_data['image_variants'] = {}
+        changed_fields = [
+            field for field, value in validated_data.items()
+            if getattr(recipe, field) != value
+        ]
+        for field in changed_fields:
+            setattr(recipe, field, validated_data[field])
+        if changed_fields or tags_changed or old_amounts != new_amounts:
+            recipe.save(update_fields=changed_fields + ['updated_at'])
+        if 'image' in validated_data:
+            images.schedule_variants(recipe)
+        return recipe
 
     def to_representation(self, instance):
+        prefetch_related_objects(
+            [instance],
+            Prefetch('tags', queryset=Tag.objects.all()),
+            Prefetch(
+                'ingredient_amount',
+                queryset=IngredientAmount.objects.select_related('ingredient'),
+            ),
+        )
         serializer = RecipeListSerializer(
             instance=instance, context={'request': self.context.get('request')}
         )
@@ -205,19 +329,20 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
 class FavoriteSerializer(serializers.Serializer):
     """Сериализатор для добавления и удаления избранных рецептов."""
 
-    def validate(self, data):
-        user = self.context.get('request').user
-        recipe_id = self.context.get('recipe_id')
-        if user.favorite.filter(recipe_id=recipe_id).exists():
-            raise serializers.ValidationError(
-                'Вы уже добавили этот рецепт в избранное'
-            )
-        return data
-
+    @atomic
     def create(self, validated_data):
         user = self.context.get('request').user
-        recipe = get_object_or_404(Recipe, pk=validated_data.get('id'))
-        recipe.favorite.create(user=user)
+        recipe_id = validated_data.get('id')
+        if not relations.insert_links(
+            Favorite, user, 'recipe', Recipe.objects, (recipe_id,)
+        ):
+            get_object_or_404(Recipe, pk=recipe_id)
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY:
+                    'Вы уже добавили этот рецепт в избранное'
+            })
+        recipe = Recipe.objects.get(pk=recipe_id)
+        counters.favorited(recipe)
         return RecipeListShortSerializer(
             instance=recipe, context={'request': self.context.get('request')}
         ).data
@@ -226,20 +351,49 @@ class FavoriteSerializer(serializers.Serializer):
 class ShoppingCartSerializer(serializers.Serializer):
     """Сериализатор для добавления и удаления рецептов из корзины."""
 
-    def validate(self, data):
-        user = self.context.get('request').user
-        recipe_id = self.context.get('recipe_id')
-        if user.shoppingcart.filter(recipe_id=recipe_id).exists():
-            raise serializers.ValidationError(
-                'Этот рецепт уже в списоке для покупок'
-            )
-        return data
-
     @atomic
     def create(self, validated_data):
         user = self.context.get('request').user
-        recipe = get_object_or_404(Recipe, pk=validated_data.get('id'))
-        recipe.shoppingcart.create(user=user)
+        recipe_id = validated_data.get('id')
+        if not relations.insert_links(
+            ShoppingCart, user, 'recipe', Recipe.objects, (recipe_id,)
+        ):
+            get_object_or_404(Recipe, pk=recipe_id)
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY:
+                    'Этот рецепт уже в списоке для покупок'
+            })
+        shopping_list.add_recipes(user.id, (recipe_id,))
         return RecipeListShortSerializer(
-            instance=recipe, context={'request': self.context.get('request')}
+            instance=Recipe.objects.get(pk=recipe_id),
+            context={'request': self.context.get('request')},
         ).data
+
+
+class BatchIdsSerializer(serializers.Serializer):
+    """Список id для пакетного добавления и удаления."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BATCH_MAX_IDS,
+    )
+
+    def validate_ids(self, ids):
+        return list(dict.fromkeys(ids))
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Сериализатор для статуса фоновой задачи."""
+
+    class Meta:
+        model = Job
+        fields = (
+            'id',
+            'name',
+            'status',
+            'attempts',
+            'result',
+            'created_at',
+            'updated_at',
+        )
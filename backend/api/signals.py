@@ -0,0 +1,59 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from recipes import shopping_list
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+from .ingredient_index import ingredient_index
+
+# Связанные строки, которые показываются в ответе рецепта.
+RECIPE_LOOKUPS = {Tag: 'tags', Ingredient: 'ingredients', User: 'author'}
+AUTHOR_FIELDS = {'email', 'username', 'first_name', 'last_name'}
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def rebuild_ingredient_index(**kwargs):
+    ingredient_index.schedule_rebuild()
+
+
+@receiver(pre_delete, sender=Recipe)
+def remove_from_shopping_lists(instance, **kwargs):
+    """
+    Срабатывает и при каскадном удалении рецептов вместе с автором, и
+    при удалении из админки: корзины ещё на месте, их удалит каскад.
+    """
+    shopping_list.remove_recipe_everywhere(instance.id)
+
+
+def touch_recipes(sender, instance):
+    Recipe.objects.filter(**{RECIPE_LOOKUPS[sender]: instance}).update(
+        updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=User)
+def touch_recipes_on_save(sender, instance, created, update_fields,
+                          **kwargs):
+    """
+    ETag и Last-Modified рецепта считаются по updated_at, поэтому
+    изменение тега, ингредиента или автора сдвигает updated_at всех
+    его рецептов. Сохранения, не задевшие показываемых полей автора
+    (например, last_login при входе), рецепты не трогают.
+    """
+    if created:
+        return
+    if (
+        sender is User and update_fields is not None
+        and not AUTHOR_FIELDS & set(update_fields)
+    ):
+        return
+    touch_recipes(sender, instance)
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def touch_recipes_on_delete(sender, instance, **kwargs):
+    touch_recipes(sender, instance)
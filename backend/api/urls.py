@@ -1,11 +1,13 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from api.views import IngredientViewSet, RecipeViewSet, TagViewSet
+from api.views import (IngredientViewSet, JobViewSet, RecipeViewSet,
+                       TagViewSet)
 from users.views import UserViewSet
 
 router = DefaultRouter()
 router.register('ingredients', IngredientViewSet, basename='ingredients')
+router.register('jobs', JobViewSet, basename='jobs')
 router.register('recipes', RecipeViewSet, basename='recipes')
 router.register('tags', TagViewSet, basename='tags')
 router.register('users', UserViewSet, basename='users')
@@ -1,16 +1,112 @@
 import csv
+import os
+from itertools import islice
+from tempfile import SpooledTemporaryFile
 
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
 
+FIELDS = ('ingredient__name', 'ingredient__measurement_unit', 'amount')
+ROWS_PER_CHUNK = 500
+PDF_FONT = 'ShoppingList'
+PDF_FONT_SIZE = 12
+PDF_MARGIN = 50
 
-def queryset_to_csv(queryset):
 
-    response = HttpResponse(
-        content_type="text/csv",
-        headers={'Content-Disposition':
-                 'attachment; filename="shopping_list.csv"'},
+class Echo:
+    """Буфер для csv.writer, который возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def chunked(rows, size=ROWS_PER_CHUNK):
+    rows = iter(rows)
+    chunk = list(islice(rows, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(rows, size))
+
+
+def shopping_list_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    for chunk in chunked(rows):
+        yield ''.join(
+            writer.writerow([row[field] for field in FIELDS])
+            for row in chunk
+        )
+
+
+def shopping_list_txt(rows):
+    for chunk in chunked(rows):
+        yield ''.join(
+            f'{name} ({unit}) — {amount}\n'
+            for name, unit, amount in (
+                [row[field] for field in FIELDS] for row in chunk
+            )
+        )
+
+
+def pdf_font():
+    """Шрифт из settings.SHOPPING_LIST_FONT или Helvetica, если файла нет."""
+    if PDF_FONT in pdfmetrics.getRegisteredFontNames():
+        return PDF_FONT
+    if not os.path.exists(settings.SHOPPING_LIST_FONT):
+        return 'Helvetica'
+    pdfmetrics.registerFont(TTFont(PDF_FONT, settings.SHOPPING_LIST_FONT))
+    return PDF_FONT
+
+
+def shopping_list_pdf(rows):
+    """
+    Рисует PDF через Canvas во временный файл, который остаётся в
+    памяти, только пока он меньше FILE_UPLOAD_MAX_MEMORY_SIZE.
+    """
+    # Canvas держит все страницы в памяти до save(). Это допустимо:
+    # в списке покупок одна строка на ингредиент, а в справочнике их
+    # около 2200, то есть не больше полусотни страниц текста.
+    file = SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    canvas = Canvas(file, pagesize=A4, pageCompression=1)
+    font = pdf_font()
+    top = A4[1] - PDF_MARGIN
+    y = top
+    canvas.setFont(font, PDF_FONT_SIZE)
+    for text in shopping_list_txt(rows):
+        for line in text.splitlines():
+            if y < PDF_MARGIN:
+                canvas.showPage()
+                canvas.setFont(font, PDF_FONT_SIZE)
+                y = top
+            canvas.drawString(PDF_MARGIN, y, line)
+            y -= PDF_FONT_SIZE * 1.5
+    canvas.save()
+    file.seek(0)
+    return file
+
+
+def shopping_list_response(rows, export_format):
+    """Потоковый ответ со списком покупок в формате csv, txt или pdf."""
+    filename = f'shopping_list.{export_format}'
+    if export_format == 'pdf':
+        return FileResponse(
+            shopping_list_pdf(rows),
+            as_attachment=True,
+            filename=filename,
+            content_type='application/pdf',
+        )
+    if export_format == 'txt':
+        content, content_type = shopping_list_txt(rows), 'text/plain'
+    else:
+        content, content_type = shopping_list_csv(rows), 'text/csv'
+    return StreamingHttpResponse(
+        content,
+        content_type=f'{content_type}; charset=utf-8',
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"'
+        },
     )
-    writer = csv.DictWriter(response, fieldnames=queryset.first().keys())
-    writer.writeheader()
-    writer.writerows(queryset)
-    return response
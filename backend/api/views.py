@@ -1,24 +1,46 @@
-from django.db.models import Sum
-from django.shortcuts import get_object_or_404
+from itertools import chain
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Exists, OuterRef, Prefetch
+from django.db.transaction import atomic
+from django.http import Http404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 
+from .conditional import (ingredients_etag, ingredients_last_modified,
+                          recipe_etag, recipe_last_modified, tags_etag)
 from .filters import IngredientFilter, RecipeFilter
-from recipes.models import (Favorite, Ingredient, Recipe, ShoppingCart, Tag)
+from .ingredient_index import ingredient_index
+from .pagination import FeedPagination, KeysetPagination
+from jobs.models import Job
+from jobs.queue import enqueue
+from recipes import counters, feed, relations, shopping_list
+from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
+                            ShoppingCart, ShoppingListItem, Tag)
 from .permissions import IsAuthorOrAdminOrReadOnly
 
 from api.serializers import (
+    BatchIdsSerializer,
     FavoriteSerializer,
     IngredientSerializer,
+    JobSerializer,
     RecipeCreateSerializer,
     RecipeListSerializer,
     ShoppingCartSerializer,
     TagSerializer,
 )
-from .utils import queryset_to_csv
+from .renderers import CSVRenderer, PDFRenderer, TextRenderer
+from .utils import shopping_list_response
 
 
 class TagViewSet(viewsets.ModelViewSet):
@@ -27,6 +49,10 @@ class TagViewSet(viewsets.ModelViewSet):
     serializer_class = TagSerializer
     pagination_class = None
 
+    @method_decorator(condition(etag_func=tags_etag))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 class IngredientViewSet(viewsets.ModelViewSet):
 
@@ -36,6 +62,33 @@ class IngredientViewSet(viewsets.ModelViewSet):
     filterset_class = IngredientFilter
     pagination_class = None
 
+    @method_decorator(condition(
+        etag_func=ingredients_etag,
+        last_modified_func=ingredients_last_modified,
+    ))
+    def list(self, request, *args, **kwargs):
+        limit = request.query_params.get('limit')
+        if not (limit and limit.isdigit()):
+            limit = settings.INGREDIENT_SEARCH_LIMIT
+        ingredients = ingredient_index.search(
+            request.query_params.get('name', ''), int(limit)
+        )
+        if ingredients is None:
+            return super().list(request, *args, **kwargs)
+        return Response(ingredients)
+
+
+class JobViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Статус фоновой задачи, поставленной пользователем."""
+
+    serializer_class = JobSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get_queryset(self):
+        if self.request.user.is_staff:
+            return Job.objects.all()
+        return Job.objects.filter(user=self.request.user)
+
 
 class RecipeViewSet(
     mixins.CreateModelMixin,
@@ -49,6 +102,30 @@ class RecipeViewSet(
     queryset = Recipe.objects.all()
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    cursor_ordering = ('-pub_date', '-id')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve', 'feed'):
+            return queryset.select_related('author')
+        queryset = queryset.prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.all()),
+            Prefetch(
+                'ingredient_amount',
+                queryset=IngredientAmount.objects.select_related('ingredient'),
+            ),
+        ).select_related('author')
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset
+        return queryset.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+        )
 
     def get_permissions(self):
 
@@ -58,6 +135,7 @@ class RecipeViewSet(
             'favorite': [permissions.IsAuthenticated()],
             'shopping_cart': [permissions.IsAuthenticated()],
             'download_shopping_cart': [permissions.IsAuthenticated()],
+            'import_recipes': [permissions.IsAdminUser()],
             'list': [permissions.AllowAny()],
             'retrieve': [permissions.AllowAny()],
         }
@@ -73,17 +151,78 @@ class RecipeViewSet(
             'download_shopping_cart': RecipeCreateSerializer,
             'list': RecipeListSerializer,
             'retrieve': RecipeListSerializer,
+            'feed': RecipeListSerializer,
             'favorite': FavoriteSerializer,
             'shopping_cart': ShoppingCartSerializer,
+            'favorite_batch': BatchIdsSerializer,
+            'shopping_cart_batch': BatchIdsSerializer,
         }
         return serializer_class_dict.get(self.action, RecipeCreateSerializer)
 
+    @method_decorator(vary_on_headers('Authorization'))
+    @method_decorator(condition(
+        etag_func=recipe_etag,
+        last_modified_func=recipe_last_modified,
+    ))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
     def perform_update(self, serializer):
         serializer.save(author=self.request.user)
 
+    @atomic
+    def perform_destroy(self, instance):
+        counters.recipe_deleted(instance)
+        instance.delete()
+
+    @action(['GET'], detail=False)
+    def feed(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        if KeysetPagination.applies_to(queryset):
+            paginator = FeedPagination()
+        else:
+            queryset = queryset.filter(feed.feed_filter(request.user))
+            paginator = self.paginator
+        page = paginator.paginate_queryset(queryset, request, self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(['POST'], detail=False, url_path='import')
+    def import_recipes(self, request):
+        """
+        Принимает NDJSON с рецептами и ставит импорт в очередь.
+        Отчёт по строкам — в результате задачи /api/jobs/<id>/.
+        """
+        if request.stream is None:
+            raise ValidationError({'errors': 'Пустой запрос'})
+        path = default_storage.save(
+            f'imports/{uuid4().hex}.ndjson', File(request.stream)
+        )
+        key = request.headers.get('Idempotency-Key')
+        job = enqueue(
+            'recipes.import',
+            {'path': path, 'user_id': request.user.id},
+            user=request.user,
+            idempotency_key=f'import:{request.user.id}:{key}' if key else None,
+            # Пачки коммитятся по отдельности: повтор с первой строки
+            # создал бы уже импортированные рецепты ещё раз. Долгий
+            # импорт не забирают повторно, пока воркер продлевает
+            # блокировку (jobs.queue.heartbeat).
+            max_attempts=1,
+        )
+        if job.payload['path'] != path:
+            default_storage.delete(path)
+        return Response(
+            JobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': reverse(
+                'jobs-detail', args=(job.id,), request=request
+            )},
+        )
+
     @action(['POST', 'DELETE'], detail=True)
     def favorite(self, request, pk=None):
 
@@ -96,11 +235,36 @@ class RecipeViewSet(
             response_data = serializer.save(id=pk)
             return Response(data=response_data, status=status.HTTP_201_CREATED)
         elif self.request.method == 'DELETE':
-            user = self.request.user
-            recipe = get_object_or_404(Recipe, pk=pk)
-            get_object_or_404(Favorite, user=user, recipe=recipe).delete()
+            with atomic():
+                if not relations.delete_links(
+                    Favorite, request.user, 'recipe', (pk,)
+                ):
+                    raise Http404
+                counters.favorited_many((pk,), -1)
             return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def batch_ids(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['ids']
+
+    @action(['POST', 'DELETE'], detail=False, url_path='favorite')
+    def favorite_batch(self, request):
+        """Добавляет в избранное или убирает из него несколько рецептов."""
+        ids = self.batch_ids(request)
+        with atomic():
+            if request.method == 'POST':
+                results, changed = relations.link(
+                    Favorite, request.user, 'recipe', Recipe.objects, ids
+                )
+                counters.favorited_many(changed)
+            else:
+                results, changed = relations.unlink(
+                    Favorite, request.user, 'recipe', Recipe.objects, ids
+                )
+                counters.favorited_many(changed, -1)
+        return Response({'results': results})
+
     @action(['POST', 'DELETE'], detail=True)
     def shopping_cart(self, request, pk=None):
 
@@ -113,25 +277,49 @@ class RecipeViewSet(
             response_data = serializer.save(id=pk)
             return Response(data=response_data, status=status.HTTP_201_CREATED)
         elif self.request.method == 'DELETE':
-            user = self.request.user
-            recipe = get_object_or_404(Recipe, pk=pk)
-            get_object_or_404(ShoppingCart, user=user, recipe=recipe).delete()
+            with atomic():
+                if not relations.delete_links(
+                    ShoppingCart, request.user, 'recipe', (pk,)
+                ):
+                    raise Http404
+                shopping_list.remove_recipes(request.user.id, (pk,))
             return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(['POST', 'DELETE'], detail=False, url_path='shopping_cart')
+    def shopping_cart_batch(self, request):
+        """Добавляет в корзину или убирает из неё несколько рецептов."""
+        ids = self.batch_ids(request)
+        user = request.user
+        with atomic():
+            if request.method == 'POST':
+                results, changed = relations.link(
+                    ShoppingCart, user, 'recipe', Recipe.objects, ids
+                )
+                shopping_list.add_recipes(user.id, changed)
+            else:
+                results, changed = relations.unlink(
+                    ShoppingCart, user, 'recipe', Recipe.objects, ids
+                )
+                shopping_list.remove_recipes(user.id, changed)
+        return Response({'results': results})
+
     @action(detail=False,
             methods=['GET'],
-            permission_classes=(permissions.IsAuthenticated,)
+            permission_classes=(permissions.IsAuthenticated,),
+            renderer_classes=(CSVRenderer, TextRenderer, PDFRenderer),
             )
     def download_shopping_cart(self, request):
         ingredients = (
-            Recipe.ingredients.through.objects.filter(
-                recipe__shoppingcart__user=request.user)
+            ShoppingListItem.objects.filter(user=request.user)
             .values('ingredient__name',
-                    'ingredient__measurement_unit')
-            .annotate(amount=Sum('amount'))
+                    'ingredient__measurement_unit',
+                    'amount')
             .order_by('ingredient__name')
+            .iterator(chunk_size=settings.SHOPPING_LIST_CHUNK_SIZE)
         )
-        if not ingredients.exists():
+        first = next(ingredients, None)
+        if first is None:
             raise ValidationError({'errors': 'Корзина пуста'})
-        response = queryset_to_csv(ingredients)
-        return response
+        return shopping_list_response(
+            chain((first,), ingredients), request.accepted_renderer.format
+        )
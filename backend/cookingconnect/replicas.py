@@ -0,0 +1,126 @@
+"""
+Чтение с реплик базы данных.
+
+ReplicaMiddleware отправляет GET и HEAD запросы к представлениям из
+settings.REPLICA_VIEWS на одну из реплик settings.DATABASE_REPLICAS;
+ReplicaRouter направляет туда чтения, записи всегда идут в default.
+Токены и сессии читаются с основной базы, чтобы только что выданный
+токен сразу работал.
+
+После запроса, меняющего данные, тот же клиент (по заголовку
+Authorization или сессионной cookie) settings.REPLICA_STICKY_SECONDS
+читает с основной базы и видит свои изменения, даже если реплика
+отстаёт. Отметка хранится в кэше settings.REPLICA_STICKY_CACHE, общем
+для всех процессов (REPLICA_CACHE_BACKEND и REPLICA_CACHE_LOCATION):
+с локальным кэшем следующий запрос, попавший в другой процесс, её не
+увидит. Реплика, к которой не удалось подключиться, пропускается
+settings.REPLICA_RETRY_SECONDS; если доступных реплик нет, чтение идёт
+в основную базу.
+"""
+import logging
+import random
+import time
+from contextvars import ContextVar
+from hashlib import sha256
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_APPS = frozenset(('authtoken', 'sessions'))
+SAFE_METHODS = frozenset(('GET', 'HEAD'))
+STICKY_KEY = 'replica-sticky:{}'
+
+read_alias = ContextVar('read_alias', default=None)
+unavailable = {}
+
+
+class ReplicaRouter:
+    """Чтения в реплику, выбранную ReplicaMiddleware для запроса."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        return read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+def view_path(view_func):
+    view = getattr(view_func, 'cls', view_func)
+    return f'{view.__module__}.{view.__qualname__}'
+
+
+def client_key(request):
+    credentials = request.headers.get('Authorization') or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+    if not credentials:
+        return None
+    return STICKY_KEY.format(sha256(credentials.encode()).hexdigest())
+
+
+def is_sticky(request):
+    key = client_key(request)
+    return key is not None and bool(
+        caches[settings.REPLICA_STICKY_CACHE].get(key)
+    )
+
+
+def stick(request):
+    """Читать с основной базы, пока реплики догоняют запись клиента."""
+    key = client_key(request)
+    if key is not None:
+        caches[settings.REPLICA_STICKY_CACHE].set(
+            key, True, settings.REPLICA_STICKY_SECONDS
+        )
+
+
+def available_replica():
+    """Случайная доступная реплика или None."""
+    now = time.monotonic()
+    replicas = [
+        alias for alias in settings.DATABASE_REPLICAS
+        if unavailable.get(alias, 0) <= now
+    ]
+    random.shuffle(replicas)
+    for alias in replicas:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            logger.warning('Реплика %s недоступна', alias, exc_info=True)
+            unavailable[alias] = now + settings.REPLICA_RETRY_SECONDS
+            continue
+        return alias
+    return None
+
+
+class ReplicaMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = read_alias.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_alias.reset(token)
+        if request.method not in SAFE_METHODS:
+            stick(request)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in SAFE_METHODS
+            and view_path(view_func) in settings.REPLICA_VIEWS
+            and not is_sticky(request)
+        ):
+            read_alias.set(available_replica())
@@ -34,6 +34,7 @@ INSTALLED_APPS = [
     'api',
     'recipes',
     'users',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -44,6 +45,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'cookingconnect.replicas.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'cookingconnect.urls'
@@ -77,6 +79,65 @@ DATABASES = {
     }
 }
 
+DATABASE_REPLICAS = []
+for number, host in enumerate(
+    filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))
+):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['cookingconnect.replicas.ReplicaRouter']
+
+REPLICA_VIEWS = (
+    'api.views.RecipeViewSet',
+    'api.views.IngredientViewSet',
+    'api.views.TagViewSet',
+    'users.views.UserViewSet',
+)
+REPLICA_STICKY_SECONDS = 5
+REPLICA_STICKY_CACHE = 'replicas'
+REPLICA_RETRY_SECONDS = 30
+
+SUBSCRIPTION_CACHE_BACKEND = os.getenv(
+    'SUBSCRIPTION_CACHE_BACKEND',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Подписка сбрасывает запись во всех процессах backend только в
+    # общем кэше; с локальным другие воркеры до TIMEOUT отдают старый
+    # is_subscribed.
+    'subscriptions': {
+        'BACKEND': SUBSCRIPTION_CACHE_BACKEND,
+        'LOCATION': os.getenv('SUBSCRIPTION_CACHE_LOCATION', 'subscriptions'),
+        'TIMEOUT': 60,
+        # MAX_ENTRIES есть только у локального кэша, клиент memcached
+        # такого параметра не принимает.
+        'OPTIONS': (
+            {'MAX_ENTRIES': 10000}
+            if SUBSCRIPTION_CACHE_BACKEND.endswith('LocMemCache') else {}
+        ),
+    },
+    # Отметки «читать с основной базы» должны видеть все процессы и
+    # контейнеры backend: при нескольких воркерах нужен общий кэш.
+    'replicas': {
+        'BACKEND': os.getenv(
+            'REPLICA_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('REPLICA_CACHE_LOCATION', 'replicas'),
+    },
+}
+
+SUBSCRIPTION_CACHE = 'subscriptions'
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -132,3 +193,37 @@ APPEND_SLASH = True
 
 INGREDIENT_MIN = 1
 INGREDIENT_MAX = 5000
+
+INGREDIENT_INDEX_PATH = os.getenv(
+    'INGREDIENT_INDEX_PATH', os.path.join(BASE_DIR, 'ingredients.idx')
+)
+INGREDIENT_SEARCH_LIMIT = 50
+
+BATCH_MAX_IDS = 100
+
+RECIPE_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+RECIPE_IMAGE_MAX_PIXELS = 40_000_000
+RECIPE_IMAGE_MAX_SIDE = 2560
+RECIPE_IMAGE_VARIANTS = {
+    'thumbnail': 320,
+    'card': 640,
+    'full': None,
+}
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+JOB_POLL_INTERVAL = 1.0
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_DELAY = 10
+JOB_TIMEOUT = 600
+JOB_HEARTBEAT = 60
+
+FAVORITE_COUNTER_SHARDS = int(os.getenv('FAVORITE_COUNTER_SHARDS', 0))
+FAVORITE_COUNTER_HOT = 1000
+
+FEED_FANOUT_LIMIT = 1000
+FEED_BACKFILL = 50
+
+SHOPPING_LIST_CHUNK_SIZE = 2000
+SHOPPING_LIST_FONT = os.getenv(
+    'SHOPPING_LIST_FONT', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
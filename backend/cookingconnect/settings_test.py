@@ -0,0 +1,43 @@
+"""Настройки для запуска тестов без Postgres."""
+import os
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+    # Отдельная база вместо реплики: тесты маршрутизации включают её
+    # через override_settings(DATABASE_REPLICAS=['replica']).
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+}
+
+DATABASE_REPLICAS = []
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='cookingconnect-media-')
+
+ALLOWED_HOSTS = ['testserver', 'localhost']
+
+INGREDIENT_INDEX_PATH = os.path.join(MEDIA_ROOT, 'ingredients.idx')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'subscriptions': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'replicas': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'replicas',
+    },
+}
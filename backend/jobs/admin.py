@@ -0,0 +1,22 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Background jobs queued for run_workers."""
+
+    list_display = (
+        'id',
+        'name',
+        'status',
+        'priority',
+        'attempts',
+        'user',
+        'created_at',
+        'updated_at',
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'idempotency_key')
+    readonly_fields = ('result', 'error', 'locked_at')
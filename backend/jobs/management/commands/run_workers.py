@@ -0,0 +1,78 @@
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import close_old_connections, connections
+
+from jobs.queue import claim, run, run_pending
+
+
+def work(stop, poll):
+    while not stop.is_set():
+        close_old_connections()
+        job = claim()
+        if job is None:
+            stop.wait(poll)
+            continue
+        run(job)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Запуск воркеров очереди фоновых задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.JOB_WORKERS,
+            help='Число воркеров.',
+        )
+        parser.add_argument(
+            '--processes',
+            action='store_true',
+            help='Воркеры-процессы вместо потоков (для задач на CPU).',
+        )
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=settings.JOB_POLL_INTERVAL,
+            help='Пауза между опросами пустой очереди, секунд.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить накопившиеся задачи и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            done = run_pending()
+            self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}'))
+            return
+        if options['processes']:
+            context = multiprocessing.get_context('fork')
+            stop = context.Event()
+            connections.close_all()
+            workers = [
+                context.Process(target=work, args=(stop, options['poll']))
+                for _ in range(options['workers'])
+            ]
+        else:
+            stop = threading.Event()
+            workers = [
+                threading.Thread(target=work, args=(stop, options['poll']))
+                for _ in range(options['workers'])
+            ]
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stop.set())
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Запущено воркеров: {len(workers)}')
+        while not stop.is_set():
+            stop.wait(1)
+        for worker in workers:
+            worker.join()
+        self.stdout.write(self.style.SUCCESS('Воркеры остановлены'))
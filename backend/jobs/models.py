@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Background job stored in the database and run by run_workers."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнено'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(
+        verbose_name='Задача',
+        max_length=100,
+    )
+    payload = models.JSONField(
+        verbose_name='Параметры',
+        default=dict,
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+    )
+    priority = models.SmallIntegerField(
+        verbose_name='Приоритет',
+        default=0,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток',
+        default=0,
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name='Максимум попыток',
+        default=3,
+    )
+    idempotency_key = models.CharField(
+        verbose_name='Ключ идемпотентности',
+        max_length=200,
+        null=True,
+        blank=True,
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='jobs',
+        null=True,
+        blank=True,
+    )
+    result = models.JSONField(
+        verbose_name='Результат',
+        null=True,
+        blank=True,
+    )
+    error = models.TextField(
+        verbose_name='Ошибка',
+        blank=True,
+    )
+    run_after = models.DateTimeField(
+        verbose_name='Не раньше',
+        default=timezone.now,
+    )
+    locked_at = models.DateTimeField(
+        verbose_name='Взята в работу',
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Создана',
+        auto_now_add=True,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Изменена',
+        auto_now=True,
+    )
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('-created_at',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('idempotency_key',),
+                name='job_idempotency_key_unique',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('status', '-priority', 'run_after'),
+                name='job_queue_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} #{self.id} ({self.status})'
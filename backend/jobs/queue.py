@@ -0,0 +1,191 @@
+"""
+Очередь фоновых задач в базе данных.
+
+Задача — функция, зарегистрированная декоратором @task в модуле
+tasks.py любого приложения. enqueue() ставит её в очередь, команда
+run_workers выполняет. Воркер забирает задачу условным UPDATE по
+статусу, поэтому одну задачу не возьмут двое и без блокировок на
+уровне СУБД. Упавшая задача повторяется с экспоненциальной паузой,
+пока не исчерпает max_attempts.
+
+Пока задача выполняется, воркер раз в settings.JOB_HEARTBEAT секунд
+продлевает locked_at. Задача, чья блокировка не продлевалась дольше
+settings.JOB_TIMEOUT секунд, осталась от упавшего воркера: её забирает
+другой воркер, а если попытки исчерпаны, она помечается FAILED.
+"""
+import logging
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+CLAIM_CANDIDATES = 10
+
+
+def task(name, atomic=True):
+    """
+    Регистрирует функцию как задачу с именем name. Задача выполняется
+    в одной транзакции, если не указано atomic=False.
+    """
+
+    def register(function):
+        TASKS[name] = transaction.atomic(function) if atomic else function
+        return function
+
+    return register
+
+
+def enqueue(name, payload=None, priority=0, idempotency_key=None,
+            user=None, max_attempts=None):
+    """
+    Ставит задачу в очередь. Если задача с тем же idempotency_key уже
+    есть, возвращает её.
+    """
+    if name not in TASKS:
+        raise KeyError(f'Неизвестная задача {name}')
+    fields = {
+        'name': name,
+        'payload': payload or {},
+        'priority': priority,
+        'user': user,
+        'max_attempts': max_attempts or settings.JOB_MAX_ATTEMPTS,
+    }
+    if idempotency_key is None:
+        return Job.objects.create(**fields)
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                idempotency_key=idempotency_key, **fields
+            )
+    except IntegrityError:
+        return Job.objects.get(idempotency_key=idempotency_key)
+
+
+def enqueue_on_commit(*args, **kwargs):
+    """Ставит задачу в очередь после коммита текущей транзакции."""
+    transaction.on_commit(lambda: enqueue(*args, **kwargs))
+
+
+def claim():
+    """
+    Забирает следующую задачу или возвращает None. Брошенные задачи
+    с исчерпанными попытками помечаются FAILED, а не запускаются снова.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOB_TIMEOUT)
+    candidates = Job.objects.filter(
+        Q(status=Job.QUEUED, run_after__lte=now)
+        | Q(status=Job.RUNNING, locked_at__lt=stale)
+    ).order_by('-priority', 'run_after', 'id').values_list(
+        'id', 'status', 'locked_at', 'attempts', 'max_attempts'
+    )[:CLAIM_CANDIDATES]
+    for job_id, status, locked_at, attempts, max_attempts in candidates:
+        job = Job.objects.filter(
+            id=job_id, status=status, locked_at=locked_at
+        )
+        if status == Job.RUNNING and attempts >= max_attempts:
+            if job.update(
+                status=Job.FAILED,
+                error='Воркер перестал продлевать блокировку задачи',
+                updated_at=now,
+            ):
+                logger.error('Задача %s брошена воркером', job_id)
+            continue
+        claimed = job.update(
+            status=Job.RUNNING,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def beat(job):
+    """
+    Продлевает блокировку задачи. Возвращает False, если задачу уже
+    забрал другой воркер.
+    """
+    now = timezone.now()
+    if not Job.objects.filter(id=job.id, locked_at=job.locked_at).update(
+        locked_at=now
+    ):
+        return False
+    job.locked_at = now
+    return True
+
+
+@contextmanager
+def heartbeat(job):
+    """Продлевает блокировку job из отдельного потока, пока идёт блок."""
+    stop = threading.Event()
+
+    def beat_until_stopped():
+        try:
+            while not stop.wait(settings.JOB_HEARTBEAT) and beat(job):
+                pass
+        except DatabaseError:
+            logger.exception('Не удалось продлить блокировку задачи %s', job)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=beat_until_stopped, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def finish(job, **fields):
+    fields['updated_at'] = timezone.now()
+    Job.objects.filter(id=job.id, locked_at=job.locked_at).update(**fields)
+
+
+def run(job):
+    """Выполняет задачу и записывает результат или планирует повтор."""
+    try:
+        with heartbeat(job):
+            result = TASKS[job.name](**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            logger.warning('Задача %s упала, повтор через %s с',
+                           job, delay)
+            finish(
+                job,
+                status=Job.QUEUED,
+                error=error,
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+        else:
+            logger.error('Задача %s упала окончательно', job)
+            finish(job, status=Job.FAILED, error=error)
+        return False
+    finish(job, status=Job.DONE, result=result, error='')
+    return True
+
+
+def run_pending(limit=None):
+    """Выполняет задачи из очереди, пока они есть. Возвращает их число."""
+    done = 0
+    while limit is None or done < limit:
+        job = claim()
+        if job is None:
+            break
+        run(job)
+        done += 1
+    return done
@@ -2,8 +2,9 @@ from django.contrib import admin
 from import_export.admin import ImportExportModelAdmin
 from import_export.resources import ModelResource
 
+from . import shopping_list
 from .models import (Favorite, Ingredient, IngredientAmount,
-                     Recipe, ShoppingCart, Tag)
+                     Recipe, ShoppingCart, ShoppingListItem, Tag)
 
 
 class RecipeResource(ModelResource):
@@ -37,10 +38,16 @@ class RecipeAdmin(ImportExportModelAdmin):
         'id',
         'name',
         'author',
+        'favorites_count',
     )
     list_filter = ('author', 'name', 'tags')
     search_fields = ('name', 'author')
 
+    def save_related(self, request, form, formsets, change):
+        recipe_ids = (form.instance.id,) if change else ()
+        with shopping_list.recipes_changing(recipe_ids):
+            super().save_related(request, form, formsets, change)
+
 
 class TagResource(ModelResource):
     """Tagging Resource Model."""
@@ -93,7 +100,19 @@ class IngredientAdmin(ImportExportModelAdmin):
     )
 
 
-class IngredientAmountResource(ModelResource):
+class ShoppingListResource(ModelResource):
+    """Rebuilds the shopping lists after a real (not dry-run) import."""
+
+    def after_import(self, dataset, result, using_transactions, dry_run,
+                     **kwargs):
+        super().after_import(
+            dataset, result, using_transactions, dry_run, **kwargs
+        )
+        if not dry_run:
+            shopping_list.rebuild()
+
+
+class IngredientAmountResource(ShoppingListResource):
     """A model of an ingredient in a recipe."""
 
     class Meta:
@@ -122,6 +141,24 @@ class IngredientAmountAdmin(ImportExportModelAdmin):
     )
     search_fields = ('recipe', 'ingredient')
 
+    def save_model(self, request, obj, form, change):
+        recipe_ids = {obj.recipe_id}
+        if change:
+            recipe_ids.update(IngredientAmount.objects.filter(
+                pk=obj.pk
+            ).values_list('recipe_id', flat=True))
+        with shopping_list.recipes_changing(recipe_ids):
+            super().save_model(request, obj, form, change)
+
+    def delete_model(self, request, obj):
+        with shopping_list.recipes_changing((obj.recipe_id,)):
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        recipe_ids = set(queryset.values_list('recipe_id', flat=True))
+        with shopping_list.recipes_changing(recipe_ids):
+            super().delete_queryset(request, queryset)
+
 
 class FavoriteResource(ModelResource):
     """A resource model of selected prescription resources."""
@@ -150,7 +187,7 @@ class FavoriteAdmin(ImportExportModelAdmin):
     search_fields = ('user', 'recipe')
 
 
-class ShoppingCartResource(ModelResource):
+class ShoppingCartResource(ShoppingListResource):
     """Prescription resource model in your shopping cart."""
 
     class Meta:
@@ -175,3 +212,41 @@ class ShoppingCartAdmin(ImportExportModelAdmin):
         'recipe',
     )
     search_fields = ('user', 'recipe')
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            old = ShoppingCart.objects.get(pk=obj.pk)
+            shopping_list.remove_recipes(old.user_id, (old.recipe_id,))
+        super().save_model(request, obj, form, change)
+        shopping_list.add_recipes(obj.user_id, (obj.recipe_id,))
+
+    def delete_model(self, request, obj):
+        shopping_list.remove_recipes(obj.user_id, (obj.recipe_id,))
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for user_id, recipe_id in queryset.values_list('user_id', 'recipe_id'):
+            shopping_list.remove_recipes(user_id, (recipe_id,))
+        super().delete_queryset(request, queryset)
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    """
+    Read-only view of the aggregated shopping lists, which are
+    maintained by recipes.shopping_list.
+    """
+
+    list_display = (
+        'id',
+        'user',
+        'ingredient',
+        'amount',
+    )
+    search_fields = ('user__username', 'ingredient__name')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,208 @@
+"""
+Синтетический набор данных для нагрузочных замеров.
+
+Генератор детерминирован: один и тот же seed даёт те же строки.
+Популярность авторов, рецептов, ингредиентов и тегов распределена по
+Ципфу, как в живой базе: немногие авторы собирают большинство
+подписчиков, немногие ингредиенты встречаются в большинстве рецептов.
+
+Строки пишутся пачками: на Postgres таблицы связей заливаются COPY,
+на других СУБД и для моделей с значениями по умолчанию используется
+bulk_create. После заливки пересчитываются производные данные:
+счётчики, списки покупок и ленты.
+"""
+import random
+from io import StringIO
+from itertools import accumulate, islice
+
+from django.db import connections, router
+from django.db.models import Max
+
+from api.ingredient_index import ingredient_index
+from users.models import Subscribe, User
+from . import counters, feed, shopping_list
+from .models import (Favorite, Ingredient, IngredientAmount, Recipe,
+                     ShoppingCart, Tag)
+
+BATCH_SIZE = 5000
+IMAGE = 'recipes/bench.png'
+ZIPF_EXPONENT = 1.1
+
+
+class Zipf:
+    """Выбор элементов items с вероятностью, обратной рангу^exponent."""
+
+    def __init__(self, items, rnd, exponent=ZIPF_EXPONENT):
+        self.items = list(items)
+        self.rnd = rnd
+        self.ranks = {item: rank for rank, item in enumerate(self.items)}
+        self.cum_weights = list(accumulate(
+            1 / rank ** exponent for rank in range(1, len(self.items) + 1)
+        ))
+
+    def choice(self):
+        return self.rnd.choices(self.items, cum_weights=self.cum_weights)[0]
+
+    def sample(self, count, exclude=None):
+        """
+        До count элементов (не больше половины) без повторов и без
+        exclude, в порядке items.
+        """
+        count = min(count, len(self.items) // 2)
+        chosen = set()
+        while len(chosen) < count:
+            chosen.update(self.rnd.choices(
+                self.items, cum_weights=self.cum_weights,
+                k=count - len(chosen),
+            ))
+            chosen.discard(exclude)
+        return sorted(chosen, key=self.ranks.__getitem__)
+
+
+def chunked(rows, size=BATCH_SIZE):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def copy_rows(model, columns, rows):
+    """
+    Вставляет кортежи rows в колонки columns таблицы model: COPY на
+    Postgres, иначе bulk_create. Возвращает число строк.
+    """
+    connection = connections[router.db_for_write(model)]
+    written = 0
+    for chunk in chunked(rows):
+        if connection.vendor == 'postgresql':
+            data = StringIO()
+            data.writelines(
+                '\t'.join(map(str, row)) + '\n' for row in chunk
+            )
+            data.seek(0)
+            quote = connection.ops.quote_name
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f'COPY {quote(model._meta.db_table)} '
+                    f'({", ".join(map(quote, columns))}) FROM STDIN',
+                    data,
+                )
+        else:
+            model.objects.bulk_create(
+                model(**dict(zip(columns, row))) for row in chunk
+            )
+        written += len(chunk)
+    return written
+
+
+def insert_objects(model, objects):
+    """bulk_create пачками; возвращает id новых строк по порядку."""
+    start = model.objects.aggregate(last=Max('id'))['last'] or 0
+    for chunk in chunked(objects):
+        model.objects.bulk_create(chunk)
+    return list(
+        model.objects.filter(id__gt=start).order_by('id')
+        .values_list('id', flat=True)
+    )
+
+
+def ensure_references(ingredients, tags):
+    """Берёт имеющиеся ингредиенты и теги, недостающие досоздаёт."""
+    existing = Ingredient.objects.count()
+    if existing < ingredients:
+        insert_objects(Ingredient, (
+            Ingredient(name=f'ингредиент {index}', measurement_unit='г')
+            for index in range(existing, ingredients)
+        ))
+        # bulk_create не шлёт post_save, индекс автодополнения
+        # пересобирается явно, как в load_ingrs.
+        ingredient_index.schedule_rebuild()
+    existing = Tag.objects.count()
+    if existing < tags:
+        insert_objects(Tag, (
+            Tag(name=f'Тег {index}', slug=f'tag-{index}',
+                color=f'#{index:06X}')
+            for index in range(existing, tags)
+        ))
+    return (
+        list(Ingredient.objects.order_by('id').values_list('id', flat=True)),
+        list(Tag.objects.order_by('id').values_list('id', flat=True)),
+    )
+
+
+def generate(users, recipes, favorites_per_user, subscriptions_per_user=10,
+             carts_per_user=3, ingredients=2000, tags=10, seed=42):
+    """Наполняет базу и возвращает {таблица: число строк}."""
+    rnd = random.Random(seed)
+    written = {}
+    ingredient_ids, tag_ids = ensure_references(ingredients, tags)
+    offset = User.objects.count()
+    user_ids = insert_objects(User, (
+        User(
+            username=f'bench{index}',
+            email=f'bench{index}@example.com',
+            first_name=f'Имя{index}',
+            last_name=f'Фамилия{index}',
+            password='!',
+        )
+        for index in range(offset, offset + users)
+    ))
+    written['users'] = len(user_ids)
+    shuffled = rnd.sample(user_ids, len(user_ids))
+    authors = Zipf(shuffled, rnd)
+    written['subscriptions'] = copy_rows(
+        Subscribe, ('user_id', 'author_id'), (
+            (user_id, author_id)
+            for user_id in user_ids
+            for author_id in authors.sample(
+                subscriptions_per_user, exclude=user_id
+            )
+        ),
+    )
+    recipe_ids = insert_objects(Recipe, (
+        Recipe(
+            author_id=authors.choice(),
+            name=f'Рецепт {index}',
+            text=f'Описание рецепта {index}',
+            image=IMAGE,
+            cooking_time=rnd.randint(1, 180),
+        )
+        for index in range(recipes)
+    ))
+    written['recipes'] = len(recipe_ids)
+    popular_tags = Zipf(tag_ids, rnd)
+    written['recipe_tags'] = copy_rows(
+        Recipe.tags.through, ('recipe_id', 'tag_id'), (
+            (recipe_id, tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in popular_tags.sample(rnd.randint(1, 3))
+        ),
+    )
+    popular_ingredients = Zipf(ingredient_ids, rnd)
+    written['ingredient_amounts'] = copy_rows(
+        IngredientAmount, ('recipe_id', 'ingredient_id', 'amount'), (
+            (recipe_id, ingredient_id, rnd.randint(1, 500))
+            for recipe_id in recipe_ids
+            for ingredient_id in popular_ingredients.sample(
+                rnd.randint(3, 12)
+            )
+        ),
+    )
+    popular_recipes = Zipf(rnd.sample(recipe_ids, len(recipe_ids)), rnd)
+    for name, model, per_user in (
+        ('favorites', Favorite, favorites_per_user),
+        ('shopping_carts', ShoppingCart, carts_per_user),
+    ):
+        written[name] = copy_rows(
+            model, ('user_id', 'recipe_id'), (
+                (user_id, recipe_id)
+                for user_id in user_ids
+                for recipe_id in popular_recipes.sample(per_user)
+            ),
+        )
+    counters.reconcile()
+    written['shopping_list_items'] = shopping_list.rebuild()
+    written['feed_items'] = feed.rebuild()
+    return written
@@ -0,0 +1,131 @@
+"""
+Денормализованные счётчики: Recipe.favorites_count,
+User.recipes_count и User.subscribers_count.
+
+Счётчики меняются UPDATE ... SET field = field + delta в той же
+транзакции, что и изменение, которое они отражают. Избранное
+популярных рецептов (от settings.FAVORITE_COUNTER_HOT) при
+settings.FAVORITE_COUNTER_SHARDS > 1 пишется в случайный шард
+FavoriteCounterShard, чтобы не конкурировать за блокировку строки
+рецепта; шарды сворачиваются в счётчик командой reconcile_counters.
+"""
+import random
+
+from django.conf import settings
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from users.models import Subscribe, User
+from .models import Favorite, FavoriteCounterShard, Recipe
+
+
+def add(queryset, field, delta):
+    """Атомарно прибавляет delta к полю; счётчик не уходит в минус."""
+    queryset.update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def recipe_created(recipe):
+    add(User.objects.filter(pk=recipe.author_id), 'recipes_count', 1)
+
+
+def recipe_deleted(recipe):
+    add(User.objects.filter(pk=recipe.author_id), 'recipes_count', -1)
+
+
+def subscribed(author_id, delta=1):
+    add(User.objects.filter(pk=author_id), 'subscribers_count', delta)
+
+
+def subscribed_many(author_ids, delta=1):
+    add(User.objects.filter(pk__in=author_ids), 'subscribers_count', delta)
+
+
+def favorited(recipe, delta=1):
+    shards = settings.FAVORITE_COUNTER_SHARDS
+    if shards > 1 and recipe.favorites_count >= settings.FAVORITE_COUNTER_HOT:
+        shard = random.randrange(shards)
+        FavoriteCounterShard.objects.bulk_create(
+            (FavoriteCounterShard(recipe_id=recipe.id, shard=shard),),
+            ignore_conflicts=True,
+        )
+        FavoriteCounterShard.objects.filter(
+            recipe_id=recipe.id, shard=shard
+        ).update(count=F('count') + delta)
+        return
+    add(Recipe.objects.filter(pk=recipe.id), 'favorites_count', delta)
+
+
+def favorited_many(recipe_ids, delta=1):
+    """favorited() для нескольких рецептов: не горячие — одним UPDATE."""
+    recipes = Recipe.objects.filter(pk__in=recipe_ids)
+    if settings.FAVORITE_COUNTER_SHARDS > 1:
+        hot = list(recipes.filter(
+            favorites_count__gte=settings.FAVORITE_COUNTER_HOT
+        ).only('id', 'favorites_count'))
+        for recipe in hot:
+            favorited(recipe, delta)
+        recipes = recipes.exclude(pk__in=[recipe.id for recipe in hot])
+    add(recipes, 'favorites_count', delta)
+
+
+def count_of(queryset, field):
+    """Подзапрос COUNT(*) по связанным строкам для UPDATE."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by().values(field)
+            .annotate(total=Count('*')).values('total')
+        ),
+        Value(0),
+    )
+
+
+def fold_shards():
+    """
+    Сворачивает шарды избранного в Recipe.favorites_count. Вызывается
+    в транзакции: шарды блокируются, и приращения, пришедшие во время
+    свёртки, дождутся её окончания.
+    """
+    shard_ids = list(
+        FavoriteCounterShard.objects.select_for_update()
+        .values_list('id', flat=True)
+    )
+    if not shard_ids:
+        return 0
+    shards = FavoriteCounterShard.objects.filter(id__in=shard_ids)
+    folded = Recipe.objects.filter(
+        pk__in=shards.values('recipe_id')
+    ).update(favorites_count=Greatest(
+        F('favorites_count') + Subquery(
+            shards.filter(recipe=OuterRef('pk'))
+            .order_by().values('recipe')
+            .annotate(total=Sum('count')).values('total')
+        ),
+        0,
+    ))
+    shards.delete()
+    return folded
+
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite.objects.all(), 'recipe'),
+    (User, 'recipes_count', Recipe.objects.all(), 'author'),
+    (User, 'subscribers_count', Subscribe.objects.all(), 'author'),
+)
+
+
+def reconcile():
+    """
+    Пересчитывает счётчики, исправляя только разошедшиеся строки.
+    Возвращает {имя счётчика: число исправленных строк}.
+    """
+    fold_shards()
+    repaired = {}
+    for model, field, related, related_field in COUNTERS:
+        actual = count_of(related, related_field)
+        repaired[f'{model._meta.model_name}.{field}'] = (
+            model.objects.alias(actual=actual)
+            .exclude(**{field: F('actual')})
+            .update(**{field: count_of(related, related_field)})
+        )
+    return repaired
@@ -0,0 +1,169 @@
+"""
+Лента рецептов авторов, на которых подписан пользователь.
+
+Опубликованный рецепт раскладывается в ленты подписчиков строками
+FeedItem (fan-out on write). Рецепты авторов, у которых подписчиков
+больше settings.FEED_FANOUT_LIMIT, в ленты не раскладываются и
+подмешиваются при чтении (fan-out on read). При подписке в ленту
+добавляются последние settings.FEED_BACKFILL рецептов автора, при
+отписке его записи из ленты удаляются.
+
+FeedItem хранит копию pub_date рецепта, поэтому страница ленты
+читается по индексу (user, -pub_date, -recipe) без обхода общей
+таблицы рецептов; рецепты авторов с fan-out on read добираются по
+индексу Recipe (author, -pub_date, -id) и сливаются по дате.
+"""
+from django.conf import settings
+from django.db.models import Count, Q
+
+from users.models import Subscribe, User
+from .models import FeedItem, Recipe
+
+BATCH_SIZE = 1000
+
+
+def followers(author_id):
+    return Subscribe.objects.filter(author_id=author_id).values_list(
+        'user_id', flat=True
+    )
+
+
+def is_pulled(author_id):
+    """Рецепты автора читаются при чтении ленты, а не раскладываются."""
+    return User.objects.filter(
+        pk=author_id, subscribers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).exists()
+
+
+def latest_recipes(author_id):
+    """Пары (id, pub_date) последних рецептов автора."""
+    return Recipe.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('id', 'pub_date')[:settings.FEED_BACKFILL]
+
+
+def push(user_ids, recipes):
+    """Раскладывает рецепты, пары (id, pub_date), в ленты user_ids."""
+    recipes = list(recipes)
+    FeedItem.objects.bulk_create(
+        (
+            FeedItem(user_id=user_id, recipe_id=recipe_id, pub_date=pub_date)
+            for user_id in user_ids
+            for recipe_id, pub_date in recipes
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def publish(recipe):
+    """Раскладывает новый рецепт в ленты подписчиков автора."""
+    if not is_pulled(recipe.author_id):
+        push(
+            followers(recipe.author_id).iterator(),
+            ((recipe.id, recipe.pub_date),),
+        )
+
+
+def follow(user_id, author_id):
+    """Добавляет в ленту последние рецепты автора после подписки."""
+    if not is_pulled(author_id):
+        push((user_id,), latest_recipes(author_id))
+
+
+def unfollow(user_id, author_id):
+    """
+    Убирает рецепты автора из ленты после отписки. Если автор при
+    этом опустился до порога, его рецепты раскладываются в ленты
+    оставшихся подписчиков.
+    """
+    FeedItem.objects.filter(
+        user_id=user_id, recipe__author_id=author_id
+    ).delete()
+    if User.objects.filter(
+        pk=author_id, subscribers_count=settings.FEED_FANOUT_LIMIT
+    ).exists():
+        push(followers(author_id).iterator(), latest_recipes(author_id))
+
+
+def follow_many(user_id, author_ids):
+    """follow() для нескольких авторов одной вставкой."""
+    pushed = User.objects.filter(
+        pk__in=author_ids, subscribers_count__lte=settings.FEED_FANOUT_LIMIT
+    ).values_list('pk', flat=True)
+    push((user_id,), [
+        recipe
+        for author_id in pushed
+        for recipe in latest_recipes(author_id)
+    ])
+
+
+def unfollow_many(user_id, author_ids):
+    """unfollow() для нескольких авторов одним удалением."""
+    FeedItem.objects.filter(
+        user_id=user_id, recipe__author_id__in=author_ids
+    ).delete()
+    for author_id in User.objects.filter(
+        pk__in=author_ids, subscribers_count=settings.FEED_FANOUT_LIMIT
+    ).values_list('pk', flat=True):
+        push(followers(author_id).iterator(), latest_recipes(author_id))
+
+
+def pulled_authors(user):
+    return Subscribe.objects.filter(
+        user=user, author__subscribers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).values('author_id')
+
+
+def feed_filter(user):
+    """
+    Условие на Recipe: рецепты из ленты пользователя. Для ленты с
+    собственной сортировкой (поиск); обычная лента читается timeline().
+    """
+    pushed = FeedItem.objects.filter(user=user).values('recipe_id')
+    return Q(pk__in=pushed) | Q(author_id__in=pulled_authors(user))
+
+
+def newest(queryset, recipe_field, limit, after):
+    """До limit пар (pub_date, id рецепта) строго после after."""
+    if after is not None:
+        pub_date, recipe_id = after
+        queryset = queryset.filter(
+            Q(pub_date__lt=pub_date)
+            | Q(pub_date=pub_date, **{f'{recipe_field}__lt': recipe_id})
+        )
+    return list(queryset.order_by(
+        '-pub_date', f'-{recipe_field}'
+    ).values_list('pub_date', recipe_field)[:limit])
+
+
+def timeline(user, limit, after=None, recipes=None):
+    """
+    Пары (pub_date, id рецепта) следующих limit записей ленты после
+    позиции after, от новых к старым. recipes — queryset Recipe с
+    фильтрами запроса, если они есть.
+    """
+    pushed = FeedItem.objects.filter(user=user)
+    pulled = Recipe.objects.all()
+    if recipes is not None and recipes.query.where:
+        pushed = pushed.filter(recipe__in=recipes.values('pk'))
+        pulled = pulled.filter(pk__in=recipes.values('pk'))
+    rows = set(newest(pushed, 'recipe_id', limit, after))
+    for author_id in pulled_authors(user).values_list('author_id', flat=True):
+        rows.update(
+            newest(pulled.filter(author_id=author_id), 'id', limit, after)
+        )
+    return sorted(rows, reverse=True)[:limit]
+
+
+def rebuild():
+    """Пересобирает ленты всех пользователей. Возвращает число строк."""
+    FeedItem.objects.all().delete()
+    authors = Subscribe.objects.values('author_id').annotate(
+        total=Count('id')
+    ).filter(
+        total__lte=settings.FEED_FANOUT_LIMIT
+    ).values_list('author_id', flat=True).order_by()
+    for author_id in authors.iterator():
+        push(followers(author_id), latest_recipes(author_id))
+    return FeedItem.objects.count()
@@ -0,0 +1,81 @@
+"""
+Уменьшенные копии и WebP-варианты фотографий рецептов.
+
+После сохранения рецепта с новой фотографией в очередь ставится
+задача recipes.image_variants; её выполняют воркеры run_workers вне
+потока запроса. Пока вариантов нет, сериализаторы отдают вместо них
+URL оригинала.
+
+settings.RECIPE_IMAGE_VARIANTS задаёт варианты {имя: ширина};
+ширина None означает WebP-копию без уменьшения.
+"""
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from jobs.queue import enqueue_on_commit
+from .models import Recipe
+
+VARIANTS_DIR = 'recipes/variants'
+WEBP_QUALITY = 80
+
+
+def variant_name(image_name, variant):
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return f'{VARIANTS_DIR}/{stem}-{variant}.webp'
+
+
+def render_variants(source, media_root, names, variants):
+    """Строит варианты файла source и возвращает {вариант: имя файла}."""
+    rendered = {}
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert(
+                'RGBA' if image.mode in ('LA', 'P') else 'RGB'
+            )
+        for variant, width in variants.items():
+            copy = image.copy()
+            if width:
+                copy.thumbnail((width, copy.height), Image.LANCZOS)
+            path = os.path.join(media_root, names[variant])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            copy.save(path, 'WEBP', quality=WEBP_QUALITY, method=4)
+            rendered[variant] = names[variant]
+    return rendered
+
+
+def build_variants(recipe_id, image_name):
+    """
+    Строит варианты фотографии и записывает их в рецепт, если
+    фотография за это время не сменилась. Возвращает {вариант: файл}.
+    """
+    variants = settings.RECIPE_IMAGE_VARIANTS
+    rendered = render_variants(
+        default_storage.path(image_name),
+        settings.MEDIA_ROOT,
+        {variant: variant_name(image_name, variant) for variant in variants},
+        variants,
+    )
+    Recipe.objects.filter(pk=recipe_id, image=image_name).update(
+        image_variants=rendered, updated_at=timezone.now()
+    )
+    return rendered
+
+
+def schedule_variants(recipe):
+    """
+    Ставит построение вариантов в очередь после коммита. Ключ включает
+    updated_at: повторный вызов для того же сохранения не создаёт
+    вторую задачу, а возврат к прежней фотографии (A → B → A) — создаёт.
+    """
+    image_name = recipe.image.name
+    version = recipe.updated_at.timestamp()
+    enqueue_on_commit(
+        'recipes.image_variants',
+        {'recipe_id': recipe.id, 'image_name': image_name},
+        idempotency_key=f'image-variants:{recipe.id}:{image_name}:{version}',
+    )
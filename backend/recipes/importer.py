@@ -0,0 +1,293 @@
+"""
+Пакетный импорт рецептов из NDJSON.
+
+Каждая строка — JSON-объект рецепта::
+
+    {"name": "...", "text": "...", "cooking_time": 15,
+     "image": "recipes/photo.jpg", "author": "chef@example.com",
+     "tags": ["breakfast", 2],
+     "ingredients": [{"id": 1, "amount": 100},
+                     {"name": "соль", "measurement_unit": "г",
+                      "amount": 5}]}
+
+Автор задаётся email или id, по умолчанию — автор импорта; теги —
+slug или id; ингредиенты — id или парой название + единица; image —
+имя уже загруженного в хранилище файла. Строки читаются пачками по
+chunk_size: ссылки всей пачки проверяются несколькими запросами по
+множествам, затем рецепты, теги и ингредиенты вставляются bulk_create
+в отдельной транзакции на пачку. Ошибочные строки пропускаются и
+попадают в отчёт с номером строки.
+"""
+import json
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections, router
+from django.db.models import Q
+from django.db.transaction import atomic
+
+from jobs.queue import enqueue_on_commit
+from users.models import User
+from . import counters, feed
+from .models import Ingredient, IngredientAmount, Recipe, Tag
+
+CHUNK_SIZE = 1000
+NAME_MAX_LENGTH = Recipe._meta.get_field('name').max_length
+COOKING_TIME_RANGE = (1, 1000)
+
+
+def parse_lines(lines):
+    """Возвращает (номер строки, рецепт или текст ошибки)."""
+    for number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield number, f'Некорректный JSON: {error}'
+            continue
+        if not isinstance(record, dict):
+            yield number, 'Ожидается объект рецепта'
+            continue
+        yield number, record
+
+
+def as_int(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def as_ref(value):
+    """Ссылка из записи: число — id, строка — ключ, прочее — None."""
+    key = as_int(value)
+    if key is None and isinstance(value, str):
+        return value
+    return key
+
+
+def split_refs(values):
+    """Делит ссылки на числовые id и строковые ключи."""
+    ids, keys = set(), set()
+    for value in values:
+        if as_int(value) is not None:
+            ids.add(as_int(value))
+        elif isinstance(value, str):
+            keys.add(value)
+    return ids, keys
+
+
+class References:
+    """Авторы, теги и ингредиенты, на которые ссылается пачка."""
+
+    def __init__(self, records):
+        authors, tags, ingredients = [], [], []
+        for record in records:
+            authors.append(record.get('author'))
+            if isinstance(record.get('tags'), list):
+                tags.extend(record['tags'])
+            if isinstance(record.get('ingredients'), list):
+                ingredients.extend(
+                    item.get('id') or item.get('name')
+                    for item in record['ingredients']
+                    if isinstance(item, dict)
+                )
+        self.authors = self.load(
+            User.objects.all(), 'email', *split_refs(authors)
+        )
+        self.tags = self.load(Tag.objects.all(), 'slug', *split_refs(tags))
+        self.ingredients = {}
+        ids, names = split_refs(ingredients)
+        if ids or names:
+            for ingredient_id, name, unit in Ingredient.objects.filter(
+                Q(id__in=ids) | Q(name__in=names)
+            ).values_list('id', 'name', 'measurement_unit'):
+                self.ingredients[ingredient_id] = ingredient_id
+                self.ingredients[(name, unit)] = ingredient_id
+
+    @staticmethod
+    def load(queryset, key_field, ids, keys):
+        """Одним запросом находит строки по id и по key_field."""
+        found = {}
+        if ids or keys:
+            for pk, key in queryset.filter(
+                Q(id__in=ids) | Q(**{f'{key_field}__in': keys})
+            ).values_list('id', key_field):
+                found[key] = found[pk] = pk
+        return found
+
+    def author(self, value, default):
+        if value is None:
+            return default
+        return self.authors.get(as_ref(value))
+
+    def tag(self, value):
+        return self.tags.get(as_ref(value))
+
+    def ingredient(self, item):
+        key = as_int(item.get('id'))
+        if key is None:
+            key = (item.get('name'), item.get('measurement_unit'))
+            if not all(isinstance(part, str) for part in key):
+                return None
+        return self.ingredients.get(key)
+
+
+def validate_ingredients(items, references, errors):
+    amounts = {}
+    if not items or not isinstance(items, list):
+        errors.append('Ингредиенты обязательны')
+        return amounts
+    for item in items:
+        if not isinstance(item, dict):
+            errors.append('Ингредиент должен быть объектом')
+            continue
+        ingredient_id = references.ingredient(item)
+        amount = as_int(item.get('amount'))
+        if ingredient_id is None:
+            errors.append(f'Ингредиент не найден: {item}')
+        elif ingredient_id in amounts:
+            errors.append('Ингредиенты не должны повторяться')
+        elif amount is None or not (
+            settings.INGREDIENT_MIN <= amount <= settings.INGREDIENT_MAX
+        ):
+            errors.append(
+                f'Количество должно быть от {settings.INGREDIENT_MIN} '
+                f'до {settings.INGREDIENT_MAX}'
+            )
+        else:
+            amounts[ingredient_id] = amount
+    return amounts
+
+
+def validate_tags(tags, references, errors):
+    tag_ids = set()
+    if not tags or not isinstance(tags, list):
+        errors.append('Теги обязательны')
+        return tag_ids
+    for tag in tags:
+        tag_id = references.tag(tag)
+        if tag_id is None:
+            errors.append(f'Тег не найден: {tag}')
+        elif tag_id in tag_ids:
+            errors.append('Теги не должны повторяться')
+        tag_ids.add(tag_id)
+    return tag_ids
+
+
+def validate(record, references, default_author):
+    """Возвращает (рецепт, теги, ингредиенты) или список ошибок."""
+    errors = []
+    name = record.get('name')
+    if not isinstance(name, str) or not name.strip():
+        errors.append('Название обязательно')
+    elif len(name) > NAME_MAX_LENGTH:
+        errors.append(f'Название длиннее {NAME_MAX_LENGTH} символов')
+    text = record.get('text')
+    if not isinstance(text, str) or not text.strip():
+        errors.append('Описание обязательно')
+    cooking_time = as_int(record.get('cooking_time'))
+    low, high = COOKING_TIME_RANGE
+    if cooking_time is None or not low <= cooking_time <= high:
+        errors.append(f'Время приготовления должно быть от {low} до {high}')
+    image = record.get('image')
+    if not isinstance(image, str) or not default_storage.exists(image):
+        errors.append(f'Изображение не найдено: {image}')
+    author_id = references.author(record.get('author'), default_author)
+    if author_id is None:
+        errors.append(f'Автор не найден: {record.get("author")}')
+    tag_ids = validate_tags(record.get('tags'), references, errors)
+    amounts = validate_ingredients(
+        record.get('ingredients'), references, errors
+    )
+    if errors:
+        return errors
+    recipe = Recipe(
+        author_id=author_id,
+        name=name,
+        text=text,
+        cooking_time=cooking_time,
+        image=image,
+    )
+    return recipe, tag_ids, amounts
+
+
+def create_recipes(recipes):
+    connection = connections[router.db_for_write(Recipe)]
+    if connection.features.can_return_rows_from_bulk_insert:
+        return Recipe.objects.bulk_create(recipes)
+    for recipe in recipes:
+        recipe.save(force_insert=True)
+    return recipes
+
+
+@atomic
+def insert_chunk(valid):
+    """Вставляет проверенные рецепты пачки. Возвращает их id."""
+    recipes = create_recipes([recipe for recipe, _, _ in valid])
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag_id)
+        for recipe, tag_ids, _ in valid
+        for tag_id in tag_ids
+    )
+    IngredientAmount.objects.bulk_create(
+        IngredientAmount(
+            recipe_id=recipe.id, ingredient_id=ingredient_id, amount=amount
+        )
+        for recipe, _, amounts in valid
+        for ingredient_id, amount in amounts.items()
+    )
+    by_author = defaultdict(list)
+    for recipe in recipes:
+        by_author[recipe.author_id].append((recipe.id, recipe.pub_date))
+    for author_id, published in by_author.items():
+        counters.add(
+            User.objects.filter(pk=author_id), 'recipes_count',
+            len(published),
+        )
+        if not feed.is_pulled(author_id):
+            feed.push(feed.followers(author_id), published)
+    recipe_ids = [recipe.id for recipe in recipes]
+    enqueue_on_commit('recipes.image_variants_batch',
+                      {'recipe_ids': recipe_ids})
+    return recipe_ids
+
+
+def import_recipes(lines, author=None, chunk_size=CHUNK_SIZE):
+    """
+    Импортирует рецепты из строк NDJSON. Возвращает отчёт
+    {'created': число, 'errors': [{'line': номер, 'errors': [...]}]}.
+    """
+    default_author = author.id if author is not None else None
+    report = {'created': 0, 'errors': []}
+    rows = parse_lines(lines)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return report
+        records = [
+            (number, record) for number, record in chunk
+            if isinstance(record, dict)
+        ]
+        for number, record in chunk:
+            if not isinstance(record, dict):
+                report['errors'].append(
+                    {'line': number, 'errors': [record]}
+                )
+        references = References(record for _, record in records)
+        valid = []
+        for number, record in records:
+            result = validate(record, references, default_author)
+            if isinstance(result, list):
+                report['errors'].append({'line': number, 'errors': result})
+            else:
+                valid.append(result)
+        if valid:
+            report['created'] += len(insert_chunk(valid))
@@ -0,0 +1,31 @@
+from django.core.management import BaseCommand
+
+from recipes import images
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Построение вариантов фотографий рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перестроить варианты и у рецептов, где они уже есть.',
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(image_variants={})
+        built = 0
+        for recipe_id, image_name in recipes.values_list('id', 'image'):
+            try:
+                images.build_variants(recipe_id, image_name)
+            except OSError as error:
+                self.stderr.write(f'{image_name}: {error}')
+                continue
+            built += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Варианты построены для {built} рецептов'
+        ))
@@ -0,0 +1,150 @@
+import re
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.views import RecipeViewSet
+from recipes.models import FeedItem, ShoppingListItem, Tag
+from users.models import User
+
+PG_SEQ_SCAN = re.compile(
+    r'Seq Scan on (?P<table>\w+).*?actual time=\S+ rows=(?P<rows>\d+)'
+)
+PG_FILTER = re.compile(r'^\s*Filter: (?P<condition>.+)$')
+SQLITE_SCAN = re.compile(
+    r'\bSCAN (?:TABLE )?(?!CONSTANT ROW)(?P<table>\w+)(?P<rest>.*)$'
+)
+
+
+def recipe_queryset(user, action='list', **params):
+    """Queryset RecipeViewSet для действия action с фильтрами params."""
+    request = Request(APIRequestFactory().get('/api/recipes/', params))
+    request.user = user
+    view = RecipeViewSet(
+        action=action, request=request, format_kwarg=None, kwargs={}
+    )
+    return view.filter_queryset(view.get_queryset())
+
+
+def hot_paths(user):
+    """Пары (имя, queryset) для запросов, которые стоит проверять."""
+    author = User.objects.order_by('-recipes_count').first()
+    tag = Tag.objects.values_list('slug', flat=True).first()
+    return (
+        ('recipes', recipe_queryset(user)),
+        ('recipes?author', recipe_queryset(user, author=author.id)),
+        ('recipes?tags', recipe_queryset(user, tags=tag)),
+        ('recipes?is_favorited', recipe_queryset(user, is_favorited=1)),
+        (
+            'recipes?is_in_shopping_cart',
+            recipe_queryset(user, is_in_shopping_cart=1),
+        ),
+        (
+            'recipes/feed',
+            FeedItem.objects.filter(user=user).order_by(
+                '-pub_date', '-recipe_id'
+            ).values_list('pub_date', 'recipe_id'),
+        ),
+        (
+            'download_shopping_cart',
+            ShoppingListItem.objects.filter(user=user).values(
+                'ingredient__name', 'ingredient__measurement_unit', 'amount'
+            ).order_by('ingredient__name'),
+        ),
+        (
+            'users/subscriptions',
+            User.objects.filter(subscribed__user=user),
+        ),
+    )
+
+
+def sequential_scans(plan, min_rows):
+    """Таблицы, которые план читает целиком: (таблица, подробности)."""
+    scans = []
+    lines = plan.splitlines()
+    for number, line in enumerate(lines):
+        if connection.vendor == 'postgresql':
+            match = PG_SEQ_SCAN.search(line)
+            if not match or int(match['rows']) < min_rows:
+                continue
+            following = lines[number + 1] if number + 1 < len(lines) else ''
+            condition = PG_FILTER.match(following)
+            scans.append((
+                match['table'],
+                condition['condition'] if condition else 'без условия',
+            ))
+        else:
+            match = SQLITE_SCAN.search(line)
+            if match and 'INDEX' not in match['rest']:
+                scans.append((match['table'], 'полный просмотр'))
+    return scans
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN для запросов главных эндпоинтов и поиск полных '
+        'просмотров таблиц. Запускать на наполненной базе (seed_bench).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='id пользователя; по умолчанию — с наибольшим числом '
+                 'подписок.',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=6,
+            help='Размер страницы, как у ?limit= в API.',
+        )
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=1000,
+            help='Не сообщать о полных просмотрах меньшего числа строк '
+                 '(только Postgres).',
+        )
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Печатать планы целиком.',
+        )
+        parser.add_argument(
+            '--fail',
+            action='store_true',
+            help='Завершиться с ошибкой, если найдены полные просмотры.',
+        )
+
+    def get_user(self, user_id):
+        if user_id is not None:
+            return User.objects.get(pk=user_id)
+        user = User.objects.annotate(
+            subscriptions=Count('subscriber')
+        ).order_by('-subscriptions', 'id').first()
+        if user is None:
+            raise CommandError('База пуста: сначала выполните seed_bench')
+        return user
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        explain_options = (
+            {'analyze': True} if connection.vendor == 'postgresql' else {}
+        )
+        flagged = 0
+        for name, queryset in hot_paths(user):
+            plan = queryset[:options['limit']].explain(**explain_options)
+            scans = sequential_scans(plan, options['min_rows'])
+            style = self.style.WARNING if scans else self.style.SUCCESS
+            self.stdout.write(style(f'{name}: полных просмотров {len(scans)}'))
+            for table, details in scans:
+                self.stdout.write(f'    {table}: {details}')
+            if options['verbose_plans'] or scans:
+                self.stdout.write(plan)
+            flagged += len(scans)
+        if flagged and options['fail']:
+            raise CommandError(f'Полных просмотров таблиц: {flagged}')
@@ -0,0 +1,57 @@
+import sys
+import time
+
+from django.core.management import BaseCommand, CommandError
+
+from recipes.importer import CHUNK_SIZE, import_recipes
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Импорт рецептов из NDJSON-файла'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Путь к NDJSON-файлу или "-" для stdin.'
+        )
+        parser.add_argument(
+            '--author',
+            help='Email автора для строк без поля author.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Рецептов в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        author = None
+        if options['author']:
+            author = User.objects.filter(email=options['author']).first()
+            if author is None:
+                raise CommandError(f'Автор {options["author"]} не найден')
+        started = time.monotonic()
+        if options['path'] == '-':
+            report = import_recipes(
+                sys.stdin.buffer, author, options['chunk_size']
+            )
+        else:
+            try:
+                with open(options['path'], 'rb') as file:
+                    report = import_recipes(
+                        file, author, options['chunk_size']
+                    )
+            except OSError as error:
+                raise CommandError(error)
+        elapsed = time.monotonic() - started
+        for row in report['errors']:
+            self.stderr.write(
+                f'Строка {row["line"]}: {"; ".join(row["errors"])}'
+            )
+        rate = report['created'] / elapsed * 60 if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано рецептов: {report["created"]}, '
+            f'ошибок: {len(report["errors"])} '
+            f'({elapsed:.1f} с, {rate:.0f} рецептов/мин)'
+        ))
@@ -1,24 +1,127 @@
 import csv
+import json
+import os
+from itertools import islice
+from time import perf_counter
 
 from django.conf import settings
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+from django.db.transaction import atomic
+
+from api.ingredient_index import ingredient_index
 from recipes.models import Ingredient
 
+READ_SIZE = 64 * 1024
+FIELDS = ('name', 'measurement_unit')
+
+
+def read_csv(file):
+    reader = csv.reader(file)
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < 2:
+            raise CommandError(
+                f'Строка {reader.line_num}: ожидались название и единица '
+                'измерения через запятую'
+            )
+        yield row[0], row[1]
+
+
+def json_row(item, number):
+    """Название и единица из number-й записи JSON-массива."""
+    if not isinstance(item, dict) or not all(
+        isinstance(item.get(field), str) for field in FIELDS
+    ):
+        raise CommandError(
+            f'Запись {number}: ожидался объект со строковыми полями '
+            'name и measurement_unit'
+        )
+    return item['name'], item['measurement_unit']
+
+
+def read_json(file):
+    """Построчно разбирает JSON-массив объектов, не читая файл целиком."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    number = 0
+    for chunk in iter(lambda: file.read(READ_SIZE), ''):
+        buffer += chunk
+        while True:
+            buffer = buffer.lstrip(' \t\r\n,')
+            if not started:
+                if not buffer:
+                    break
+                if buffer[0] != '[':
+                    raise CommandError('Ожидался JSON-массив')
+                buffer = buffer[1:]
+                started = True
+                continue
+            if buffer.startswith(']'):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                break
+            buffer = buffer[end:]
+            number += 1
+            yield json_row(item, number)
+    if buffer.strip():
+        raise CommandError('Файл JSON оборвался')
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
+
 
 class Command(BaseCommand):
-    help = 'Загрузка из csv файла'
-
-    def handle(self, *args, **kwargs):
-        data_path = settings.BASE_DIR
-        with open(
-                f'{data_path}/data/ingredients.csv',
-                'r',
-                encoding='utf-8'
-        ) as file:
-            reader = csv.reader(file)
-            for row in reader:
-                _, created = Ingredient.objects.get_or_create(
-                    name=row[0],
-                    measurement_unit=row[1],
+    help = 'Загрузка ингредиентов из csv или json файла'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=os.path.join(settings.BASE_DIR, 'data', 'ingredients.csv'),
+            help='Файл .csv (название,единица) или .json.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def unique_rows(self, path):
+        reader = READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            raise CommandError('Поддерживаются только файлы .csv и .json')
+        seen = set()
+        with open(path, 'r', encoding='utf-8') as file:
+            for name, measurement_unit in reader(file):
+                key = (name.strip(), measurement_unit.strip())
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+
+    @atomic
+    def handle(self, *args, **options):
+        started = perf_counter()
+        before = Ingredient.objects.count()
+        rows = self.unique_rows(options['path'])
+        total = 0
+        while True:
+            batch = [
+                Ingredient(name=name, measurement_unit=measurement_unit)
+                for name, measurement_unit in islice(
+                    rows, options['batch_size']
                 )
-        self.stdout.write(self.style.SUCCESS('Все ингридиенты загружены!'))
+            ]
+            if not batch:
+                break
+            Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+        created = Ingredient.objects.count() - before
+        ingredient_index.schedule_rebuild()
+        elapsed = perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Все ингридиенты загружены! Строк: {total}, новых: {created}, '
+            f'{elapsed:.2f} с ({total / elapsed:.0f} строк/с)'
+        ))
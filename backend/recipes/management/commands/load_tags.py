@@ -10,5 +10,7 @@ class Command(BaseCommand):
             {'name': 'Завтрак', 'color': '#E26C2D', 'slug': 'breakfast'},
             {'name': 'Обед', 'color': '#49B64E', 'slug': 'dinner'},
             {'name': 'Ужин', 'color': '#8775D2', 'slug': 'supper'}]
-        Tag.objects.bulk_create(Tag(**tag) for tag in data)
+        Tag.objects.bulk_create(
+            (Tag(**tag) for tag in data), ignore_conflicts=True
+        )
         self.stdout.write(self.style.SUCCESS('Все тэги загружены!'))
@@ -0,0 +1,15 @@
+from django.core.management import BaseCommand
+from django.db.transaction import atomic
+
+from recipes import feed
+
+
+class Command(BaseCommand):
+    help = 'Пересборка лент подписок'
+
+    def handle(self, *args, **options):
+        with atomic():
+            created = feed.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Ленты пересобраны: {created} строк')
+        )
@@ -0,0 +1,35 @@
+from django.core.management import BaseCommand, CommandError
+from django.db.transaction import atomic
+
+from recipes import shopping_list
+
+
+class Command(BaseCommand):
+    help = 'Пересборка и сверка агрегированных списков покупок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только сравнить списки с корзинами, ничего не меняя.',
+        )
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            mismatches = shopping_list.verify()
+            for (user_id, ingredient_id), (expected, actual) in sorted(
+                mismatches.items()
+            ):
+                self.stdout.write(
+                    f'user={user_id} ingredient={ingredient_id}: '
+                    f'ожидалось {expected}, в списке {actual}'
+                )
+            if mismatches:
+                raise CommandError(f'Расхождений: {len(mismatches)}')
+            self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+            return
+        with atomic():
+            created = shopping_list.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Списки покупок пересобраны: {created} строк')
+        )
@@ -0,0 +1,28 @@
+from django.core.management import BaseCommand
+from django.db.transaction import atomic
+
+from recipes import counters
+
+
+class Command(BaseCommand):
+    help = 'Сверка денормализованных счётчиков с исходными таблицами'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fold-only',
+            action='store_true',
+            help='Только свернуть шарды счётчика избранного.',
+        )
+
+    def handle(self, *args, **options):
+        with atomic():
+            if options['fold_only']:
+                folded = counters.fold_shards()
+                self.stdout.write(self.style.SUCCESS(
+                    f'Шарды свёрнуты: {folded} рецептов'
+                ))
+                return
+            repaired = counters.reconcile()
+        for counter, rows in repaired.items():
+            self.stdout.write(f'{counter}: исправлено {rows}')
+        self.stdout.write(self.style.SUCCESS('Счётчики сверены'))
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management import BaseCommand
+
+from recipes import bench
+
+
+class Command(BaseCommand):
+    help = (
+        'Синтетические пользователи, подписки, рецепты, избранное и '
+        'корзины для нагрузочных замеров'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--subscriptions-per-user', type=int, default=10)
+        parser.add_argument('--carts-per-user', type=int, default=3)
+        parser.add_argument(
+            '--ingredients',
+            type=int,
+            default=2000,
+            help='Досоздать ингредиенты до этого числа.',
+        )
+        parser.add_argument(
+            '--tags',
+            type=int,
+            default=10,
+            help='Досоздать теги до этого числа.',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Один seed даёт один и тот же набор данных.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        written = bench.generate(
+            users=options['users'],
+            recipes=options['recipes'],
+            favorites_per_user=options['favorites_per_user'],
+            subscriptions_per_user=options['subscriptions_per_user'],
+            carts_per_user=options['carts_per_user'],
+            ingredients=options['ingredients'],
+            tags=options['tags'],
+            seed=options['seed'],
+        )
+        elapsed = time.monotonic() - started
+        for table, rows in written.items():
+            self.stdout.write(f'{table}: {rows}')
+        total = sum(written.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {total} строк за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-6) * 60:.0f} строк в минуту)'
+        ))
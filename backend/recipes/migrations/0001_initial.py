@@ -0,0 +1,129 @@
+# Generated by Django 3.2.21 on 2026-10-17 04:22
+
+import colorfield.fields
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Favorite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'verbose_name': 'Избранный',
+                'verbose_name_plural': 'Избранные',
+            },
+        ),
+        migrations.CreateModel(
+            name='FavoriteCounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(verbose_name='Номер шарда')),
+                ('count', models.IntegerField(default=0, verbose_name='Приращение')),
+            ],
+            options={
+                'verbose_name': 'Шард счётчика избранного',
+                'verbose_name_plural': 'Шарды счётчика избранного',
+            },
+        ),
+        migrations.CreateModel(
+            name='FeedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Лента подписок',
+            },
+        ),
+        migrations.CreateModel(
+            name='Ingredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, error_messages={'blank': 'Обязательно для заполнения.', 'invalid': 'Название не корректное.'}, max_length=200, verbose_name='Название')),
+                ('measurement_unit', models.CharField(error_messages={'blank': 'Обязательно для заполнения.', 'invalid': 'Название не корректное.'}, max_length=20, verbose_name='Единицы измерения')),
+            ],
+            options={
+                'verbose_name': 'Ингредиент',
+                'verbose_name_plural': 'Ингредиенты',
+                'ordering': ('name',),
+            },
+        ),
+        migrations.CreateModel(
+            name='IngredientAmount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.PositiveSmallIntegerField(error_messages={'blank': 'Это поле обязательно для заполнения.', 'invalid': 'Введите корректное количество.'}, validators=[django.core.validators.MinValueValidator(limit_value=1, message='Ингредиентов не может быть меньше 1!'), django.core.validators.MaxValueValidator(limit_value=50000, message='Ингредиентов не может быть больше 50000!')], verbose_name='Количество')),
+            ],
+            options={
+                'verbose_name': 'Количество ингредиента',
+                'verbose_name_plural': 'Количество ингредиентов',
+                'ordering': ('recipe',),
+            },
+        ),
+        migrations.CreateModel(
+            name='Recipe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to='recipes/', verbose_name='Фотография')),
+                ('name', models.CharField(error_messages={'blank': 'Обязательно для заполнения.', 'invalid': 'Название не корректное.'}, max_length=200, verbose_name='Название')),
+                ('text', models.TextField(error_messages={'blank': 'Обязательно для заполнения.', 'invalid': 'Название не корректное.'}, verbose_name='Текстовое описание')),
+                ('cooking_time', models.PositiveSmallIntegerField(error_messages={'blank': 'Обязательно для заполнения.', 'invalid': 'Введите корректное колличество минут от 1 до 1000.'}, validators=[django.core.validators.MinValueValidator(limit_value=1, message='Время приготовления не может быть меньше 1 минуты!'), django.core.validators.MaxValueValidator(limit_value=1000, message='Время приготовления не может быть больше 1000 минут!')], verbose_name='Время приготовления')),
+                ('pub_date', models.DateTimeField(auto_now_add=True, verbose_name='Дата публикации')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+                ('image_variants', models.JSONField(blank=True, default=dict, editable=False, verbose_name='Варианты фотографии')),
+                ('favorites_count', models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном')),
+            ],
+            options={
+                'verbose_name': 'Рецепт',
+                'verbose_name_plural': 'Рецепты',
+                'ordering': ('-pub_date',),
+            },
+        ),
+        migrations.CreateModel(
+            name='ShoppingCart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'verbose_name': 'Корзина',
+                'verbose_name_plural': 'Корзины',
+            },
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, error_messages={'blank': 'Обязательно для заполнения.', 'invalid': 'Название не корректное.'}, max_length=200, unique=True, verbose_name='Название')),
+                ('color', colorfield.fields.ColorField(default='#FF0000', error_messages={'blank': 'Обязательно для заполнения.', 'invalid': 'Название не корректное.'}, image_field=None, max_length=7, samples=None, unique=True, verbose_name='Цвет')),
+                ('slug', models.SlugField(error_messages={'blank': 'Обязательно для заполнения.', 'invalid': 'Название не корректное.'}, max_length=200, unique=True, verbose_name='Индентификатор')),
+            ],
+            options={
+                'verbose_name': 'Тег',
+                'verbose_name_plural': 'Теги',
+                'ordering': ('name',),
+            },
+        ),
+        migrations.CreateModel(
+            name='ShoppingListItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField(default=0, verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.ingredient', verbose_name='Ингредиент')),
+            ],
+            options={
+                'verbose_name': 'Позиция списка покупок',
+                'verbose_name_plural': 'Список покупок',
+            },
+        ),
+    ]
@@ -30,6 +30,15 @@ class Ingredient(models.Model):
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
         ordering = ('name',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=(
+                    'name',
+                    'measurement_unit',
+                ),
+                name='ingredient_unique',
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -86,6 +95,7 @@ class Recipe(models.Model):
         verbose_name='Автор',
         on_delete=models.CASCADE,
         related_name='recipes',
+        db_index=False,
     )
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -135,11 +145,37 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
+    image_variants = models.JSONField(
+        verbose_name='Варианты фотографии',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx',
+            ),
+            # Рецепты автора по дате: фильтр author и превью подписок.
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='recipe_author_pub_date_idx',
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -193,12 +229,14 @@ class Favorite(models.Model):
         verbose_name='Пользователь',
         on_delete=models.CASCADE,
         related_name='favorite',
+        db_index=False,
     )
     recipe = models.ForeignKey(
         Recipe,
         verbose_name='Рецепт',
         on_delete=models.CASCADE,
         related_name='favorite',
+        db_index=False,
     )
 
     class Meta:
@@ -213,6 +251,14 @@ class Favorite(models.Model):
                 name='favorite_unique',
             ),
         )
+        # Уникальный индекс (recipe, user) ведёт от рецепта, этот —
+        # от пользователя (фильтры is_favorited / is_in_shopping_cart).
+        indexes = (
+            models.Index(
+                fields=('user', 'recipe'),
+                name='favorite_user_recipe_idx',
+            ),
+        )
 
     def __str__(self):
         return f'{self.user} добавил {self.recipe} в избранное'
@@ -226,12 +272,14 @@ class ShoppingCart(models.Model):
         verbose_name='Пользователь',
         on_delete=models.CASCADE,
         related_name='shoppingcart',
+        db_index=False,
     )
     recipe = models.ForeignKey(
         Recipe,
         verbose_name='Рецепт',
         on_delete=models.CASCADE,
         related_name='shoppingcart',
+        db_index=False,
     )
 
     class Meta:
@@ -246,6 +294,133 @@ class ShoppingCart(models.Model):
                 name='shopping_cart_unique',
             ),
         )
+        # Уникальный индекс (recipe, user) ведёт от рецепта, этот —
+        # от пользователя (фильтры is_favorited / is_in_shopping_cart).
+        indexes = (
+            models.Index(
+                fields=('user', 'recipe'),
+                name='shopping_cart_user_recipe_idx',
+            ),
+        )
 
     def __str__(self):
         return f'{self.user} добавил {self.recipe} в корзину'
+
+
+class ShoppingListItem(models.Model):
+    """Aggregated shopping list item, maintained from the user's cart."""
+
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        db_index=False,
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        verbose_name='Ингредиент',
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    amount = models.IntegerField(
+        verbose_name='Количество',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Список покупок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=(
+                    'user',
+                    'ingredient',
+                ),
+                name='shopping_list_item_unique',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user}: {self.ingredient}, {self.amount}'
+
+
+class FeedItem(models.Model):
+    """Recipe pushed to a subscriber's feed when its author publishes it."""
+
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='feed',
+        db_index=False,
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации рецепта',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        indexes = (
+            # Страница ленты: записи пользователя от новых к старым.
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='feed_item_user_pub_date_idx',
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=(
+                    'user',
+                    'recipe',
+                ),
+                name='feed_item_unique',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user}: {self.recipe}'
+
+
+class FavoriteCounterShard(models.Model):
+    """
+    Shard of a hot recipe's favorites counter. Shards are folded into
+    Recipe.favorites_count by the reconcile_counters command.
+    """
+
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        related_name='favorite_shards',
+    )
+    shard = models.PositiveSmallIntegerField(
+        verbose_name='Номер шарда',
+    )
+    count = models.IntegerField(
+        verbose_name='Приращение',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Шард счётчика избранного'
+        verbose_name_plural = 'Шарды счётчика избранного'
+        constraints = (
+            models.UniqueConstraint(
+                fields=(
+                    'recipe',
+                    'shard',
+                ),
+                name='favorite_counter_shard_unique',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipe} [{self.shard}]: {self.count}'
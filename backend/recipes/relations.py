@@ -0,0 +1,110 @@
+"""
+Добавление и удаление связей пользователя с объектами: избранное,
+корзина и подписки.
+
+Связь создаётся одним INSERT ... SELECT ... ON CONFLICT DO NOTHING и
+удаляется одним условным DELETE; оба запроса через RETURNING сообщают,
+какие строки они изменили. Поэтому проверка «уже есть / ещё нет» не
+требует отдельных запросов и верна при одновременных запросах: из
+двух одинаковых вставок строку создаст ровно одна, а повтор получит
+пустой результат вместо нарушения уникальности.
+
+Пакетные эндпоинты возвращают статус каждого id: created / exists при
+добавлении, deleted / absent при удалении и not_found, если объекта
+нет.
+"""
+from django.db import connections, router
+
+CREATED = 'created'
+EXISTS = 'exists'
+DELETED = 'deleted'
+ABSENT = 'absent'
+NOT_FOUND = 'not_found'
+
+
+def execute_returning(connection, sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {row[0] for row in cursor.fetchall()}
+
+
+def compile_query(queryset, connection):
+    return queryset.query.get_compiler(connection=connection).as_sql()
+
+
+def insert_links(model, user, field, targets, ids):
+    """
+    Связывает пользователя строками model с теми объектами из ids,
+    что есть в targets (поле объекта — field). Возвращает id объектов,
+    связи с которыми созданы этим запросом.
+    """
+    if not ids:
+        return set()
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    column = quote(model._meta.get_field(field).column)
+    sql, params = compile_query(
+        targets.filter(pk__in=ids).order_by().values_list('pk'), connection
+    )
+    return execute_returning(
+        connection,
+        f'INSERT INTO {quote(model._meta.db_table)} '
+        f'({quote(model._meta.get_field("user").column)}, {column}) '
+        f'SELECT %s, targets.* FROM ({sql}) targets WHERE true '
+        f'ON CONFLICT DO NOTHING RETURNING {column}',
+        (user.id, *params),
+    )
+
+
+def delete_links(model, user, field, ids):
+    """
+    Удаляет связи пользователя с объектами ids. Возвращает id
+    объектов, связи с которыми удалены этим запросом.
+    """
+    if not ids:
+        return set()
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    sql, params = compile_query(
+        model.objects.filter(user=user, **{f'{field}_id__in': ids})
+        .order_by().values_list('pk'),
+        connection,
+    )
+    return execute_returning(
+        connection,
+        f'DELETE FROM {quote(model._meta.db_table)} '
+        f'WHERE {quote(model._meta.pk.column)} IN ({sql}) '
+        f'RETURNING {quote(model._meta.get_field(field).column)}',
+        params,
+    )
+
+
+def found_ids(targets, ids):
+    return set(
+        targets.filter(pk__in=ids).order_by().values_list('pk', flat=True)
+    )
+
+
+def statuses(ids, found, changed, changed_status, unchanged_status):
+    return {
+        pk: (
+            NOT_FOUND if pk not in found
+            else changed_status if pk in changed
+            else unchanged_status
+        )
+        for pk in ids
+    }
+
+
+def link(model, user, field, targets, ids):
+    """Пакетное добавление. Возвращает (статусы, id новых связей)."""
+    found = found_ids(targets, ids)
+    created = insert_links(model, user, field, targets, found)
+    return statuses(ids, found, created, CREATED, EXISTS), created
+
+
+def unlink(model, user, field, targets, ids):
+    """Пакетное удаление. Возвращает (статусы, id удалённых связей)."""
+    found = found_ids(targets, ids)
+    deleted = delete_links(model, user, field, found)
+    return statuses(ids, found, deleted, DELETED, ABSENT), deleted
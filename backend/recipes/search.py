@@ -0,0 +1,137 @@
+"""
+Полнотекстовый поиск рецептов по названию и описанию.
+
+На Postgres используется функциональный GIN-индекс по tsvector с
+русской морфологией, на SQLite (локальные тесты) — таблица FTS5 с
+внешним содержимым, которую синхронизируют триггеры. DDL зависит от
+СУБД, поэтому миграция 0003_recipe_search_index создаёт индекс через
+RunPython(create_search_index, drop_search_index).
+
+SQLite меняет схему таблицы, пересоздавая её, и при этом теряет
+триггеры: миграция, меняющая recipes_recipe, должна удалить индекс
+перед своими операциями и создать его заново после них.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Recipe
+
+SEARCH_CONFIG = 'russian'
+SEARCH_INDEX = 'recipes_recipe_search_idx'
+FTS_TABLE = 'recipes_recipe_fts'
+WORD = re.compile(r'\w+')
+
+FTS_SETUP = (
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        name, text,
+        content='{Recipe._meta.db_table}',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT
+    ON {Recipe._meta.db_table} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE
+    ON {Recipe._meta.db_table} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF name, text
+    ON {Recipe._meta.db_table} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+FTS_TEARDOWN = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_update',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+
+
+def search_vector():
+    from django.contrib.postgres.search import SearchVector
+
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def search_index():
+    from django.contrib.postgres.indexes import GinIndex
+
+    return GinIndex(search_vector(), name=SEARCH_INDEX)
+
+
+def create_search_index(apps, schema_editor):
+    """Создаёт поисковый индекс; для RunPython в миграциях."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.add_index(
+            apps.get_model('recipes', 'Recipe'), search_index()
+        )
+    elif vendor == 'sqlite':
+        for statement in FTS_SETUP:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    """Удаляет поисковый индекс; обратная операция к create_search_index."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.remove_index(
+            apps.get_model('recipes', 'Recipe'), search_index()
+        )
+    elif vendor == 'sqlite':
+        for statement in FTS_TEARDOWN:
+            schema_editor.execute(statement)
+
+
+def search_recipes(queryset, query):
+    """Фильтрует рецепты по запросу и сортирует по релевантности."""
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        search_query = SearchQuery(
+            query, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.alias(
+            search=search_vector(),
+            rank=SearchRank(search_vector(), search_query),
+        ).filter(search=search_query).order_by('-rank', '-pub_date')
+    if vendor == 'sqlite':
+        words = WORD.findall(query)
+        if not words:
+            return queryset.none()
+        match = ' '.join(f'"{word}"*' for word in words)
+        table = Recipe._meta.db_table
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (match,),
+        )).annotate(rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = "{table}"."id"',
+            (match,),
+        )).order_by('-rank', '-pub_date')
+    return queryset.filter(
+        Q(name__icontains=query) | Q(text__icontains=query)
+    )
@@ -0,0 +1,163 @@
+"""
+Поддержка агрегированного списка покупок (ShoppingListItem).
+
+Строки списка меняются приращениями в той же транзакции, что и
+корзина или ингредиенты рецепта, поэтому выгрузка списка читает
+готовые суммы по индексу (user, ingredient). Удаление рецепта, в том
+числе каскадное вместе с автором, обрабатывает сигнал pre_delete в
+api.signals, правки из админки — хуки RecipeAdmin, ShoppingCartAdmin и
+IngredientAmountAdmin. Полная пересборка и сверка с корзинами —
+команда rebuild_shopping_lists.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from itertools import islice
+
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+from .models import IngredientAmount, ShoppingCart, ShoppingListItem
+
+BATCH_SIZE = 1000
+
+
+def recipe_amounts(recipe_ids):
+    """Суммы ингредиентов рецептов: {ingredient_id: amount}."""
+    return Counter(dict(
+        IngredientAmount.objects.filter(recipe_id__in=recipe_ids)
+        .values_list('ingredient_id')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    ))
+
+
+def apply_changes(user_ids, changes):
+    """Прибавляет changes ({ingredient_id: delta}) к спискам пользователей."""
+    user_ids = list(user_ids)
+    changes = {
+        ingredient_id: delta
+        for ingredient_id, delta in changes.items()
+        if delta
+    }
+    if not user_ids or not changes:
+        return
+    added = [
+        ingredient_id for ingredient_id, delta in changes.items() if delta > 0
+    ]
+    if added:
+        ShoppingListItem.objects.bulk_create(
+            (
+                ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id)
+                for user_id in user_ids
+                for ingredient_id in added
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=changes
+    )
+    items.update(amount=F('amount') + Case(
+        *(
+            When(ingredient_id=ingredient_id, then=Value(delta))
+            for ingredient_id, delta in changes.items()
+        ),
+        default=Value(0),
+        output_field=IntegerField(),
+    ))
+    if len(added) < len(changes):
+        items.filter(amount__lte=0).delete()
+
+
+def negate(amounts):
+    return {key: -value for key, value in amounts.items()}
+
+
+def add_recipes(user_id, recipe_ids):
+    apply_changes((user_id,), recipe_amounts(recipe_ids))
+
+
+def remove_recipes(user_id, recipe_ids):
+    apply_changes((user_id,), negate(recipe_amounts(recipe_ids)))
+
+
+def cart_users(recipe_id):
+    return ShoppingCart.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('user_id', flat=True)
+
+
+def change_recipe(recipe_id, old_amounts, new_amounts):
+    """Переносит изменение ингредиентов рецепта в списки покупок."""
+    changes = Counter(new_amounts)
+    changes.subtract(old_amounts)
+    apply_changes(cart_users(recipe_id), changes)
+
+
+@contextmanager
+def recipes_changing(recipe_ids):
+    """
+    Переносит в списки покупок изменения ингредиентов рецептов
+    recipe_ids, сделанные внутри блока with.
+    """
+    old_amounts = {
+        recipe_id: recipe_amounts((recipe_id,)) for recipe_id in recipe_ids
+    }
+    yield
+    for recipe_id, amounts in old_amounts.items():
+        change_recipe(recipe_id, amounts, recipe_amounts((recipe_id,)))
+
+
+def remove_recipe_everywhere(recipe_id):
+    """Вычитает рецепт из списков всех, у кого он в корзине."""
+    apply_changes(
+        cart_users(recipe_id), negate(recipe_amounts((recipe_id,)))
+    )
+
+
+def expected_items():
+    """Агрегат, посчитанный заново по корзинам: (user, ingredient, amount)."""
+    return (
+        IngredientAmount.objects.filter(recipe__shoppingcart__isnull=False)
+        .values_list('recipe__shoppingcart__user_id', 'ingredient_id')
+        .annotate(total=Sum('amount'))
+        .order_by()
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+
+
+def rebuild():
+    """Пересобирает все списки покупок. Возвращает число строк."""
+    ShoppingListItem.objects.all().delete()
+    rows = expected_items()
+    created = 0
+    while True:
+        items = [
+            ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id,
+                             amount=amount)
+            for user_id, ingredient_id, amount in islice(rows, BATCH_SIZE)
+        ]
+        if not items:
+            return created
+        ShoppingListItem.objects.bulk_create(items)
+        created += len(items)
+
+
+def verify():
+    """Возвращает расхождения: {(user, ingredient): (ожидалось, есть)}."""
+    expected = {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in expected_items()
+    }
+    actual = {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in (
+            ShoppingListItem.objects.values_list(
+                'user_id', 'ingredient_id', 'amount'
+            ).iterator(chunk_size=BATCH_SIZE)
+        )
+    }
+    return {
+        key: (expected.get(key, 0), actual.get(key, 0))
+        for key in expected.keys() | actual.keys()
+        if expected.get(key, 0) != actual.get(key, 0)
+    }
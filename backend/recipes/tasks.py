@@ -0,0 +1,53 @@
+import logging
+
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from jobs.queue import task
+from users.models import User
+from . import images
+from .importer import import_recipes
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+
+@task('recipes.image_variants')
+def image_variants(recipe_id, image_name):
+    return images.build_variants(recipe_id, image_name)
+
+
+@task('recipes.image_variants_batch')
+def image_variants_batch(recipe_ids):
+    """Строит варианты для импортированных рецептов; общие фото — раз."""
+    rendered = {}
+    for recipe_id, image_name in Recipe.objects.filter(
+        id__in=recipe_ids, image_variants={}
+    ).values_list('id', 'image'):
+        if image_name in rendered:
+            Recipe.objects.filter(pk=recipe_id).update(
+                image_variants=rendered[image_name],
+                updated_at=timezone.now(),
+            )
+            continue
+        try:
+            rendered[image_name] = images.build_variants(
+                recipe_id, image_name
+            )
+        except OSError:
+            logger.exception('Не удалось построить варианты %s', image_name)
+    return len(rendered)
+
+
+@task('recipes.import', atomic=False)
+def import_file(path, user_id=None):
+    """
+    Импортирует загруженный NDJSON-файл и удаляет его, даже если импорт
+    упал: файлы в media/imports раздаются nginx.
+    """
+    author = User.objects.filter(pk=user_id).first()
+    try:
+        with default_storage.open(path, 'rb') as file:
+            return import_recipes(file, author=author)
+    finally:
+        default_storage.delete(path)
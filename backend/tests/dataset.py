@@ -0,0 +1,94 @@
+"""Детерминированный набор данных для тестов производительности."""
+import random
+
+from recipes import counters, feed, shopping_list
+from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
+                            ShoppingCart, Tag)
+from users.models import Subscribe, User
+
+IMAGE = 'recipes/seed.png'
+
+
+def seed_dataset(users=60, recipes=150, ingredients=300, seed=42):
+    """
+    Наполняет базу пользователями, рецептами, подписками,
+    избранным и корзинами. Первый пользователь подписан на всех
+    остальных, чтобы список подписок занимал несколько страниц.
+    """
+    rnd = random.Random(seed)
+
+    User.objects.bulk_create(
+        User(
+            username=f'user{index}',
+            email=f'user{index}@example.com',
+            first_name=f'Имя{index}',
+            last_name=f'Фамилия{index}',
+            password='!',
+        )
+        for index in range(users)
+    )
+    user_list = list(User.objects.order_by('id'))
+
+    Tag.objects.bulk_create((
+        Tag(name='Завтрак', color='#E26C2D', slug='breakfast'),
+        Tag(name='Обед', color='#49B64E', slug='dinner'),
+        Tag(name='Ужин', color='#8775D2', slug='supper'),
+    ))
+    tag_list = list(Tag.objects.all())
+
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f'ингредиент {index}', measurement_unit='г')
+        for index in range(ingredients)
+    )
+    ingredient_list = list(Ingredient.objects.all())
+
+    Recipe.objects.bulk_create(
+        Recipe(
+            author=rnd.choice(user_list),
+            name=f'Рецепт {index}',
+            text=f'Описание рецепта {index}',
+            image=IMAGE,
+            cooking_time=rnd.randint(1, 180),
+        )
+        for index in range(recipes)
+    )
+    recipe_list = list(Recipe.objects.all())
+
+    tag_links = []
+    amounts = []
+    for recipe in recipe_list:
+        for tag in rnd.sample(tag_list, rnd.randint(1, len(tag_list))):
+            tag_links.append(
+                Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+            )
+        for ingredient in rnd.sample(ingredient_list, rnd.randint(3, 12)):
+            amounts.append(IngredientAmount(
+                recipe=recipe,
+                ingredient=ingredient,
+                amount=rnd.randint(1, 500),
+            ))
+    Recipe.tags.through.objects.bulk_create(tag_links)
+    IngredientAmount.objects.bulk_create(amounts)
+
+    favorites = []
+    carts = []
+    subscriptions = []
+    for user in user_list:
+        for recipe in rnd.sample(recipe_list, 10):
+            favorites.append(Favorite(user=user, recipe=recipe))
+        for recipe in rnd.sample(recipe_list, 5):
+            carts.append(ShoppingCart(user=user, recipe=recipe))
+        for author in rnd.sample(user_list, 5):
+            if author != user:
+                subscriptions.append(Subscribe(user=user, author=author))
+    subscriptions.extend(
+        Subscribe(user=user_list[0], author=author)
+        for author in user_list[1:]
+    )
+    Favorite.objects.bulk_create(favorites)
+    ShoppingCart.objects.bulk_create(carts)
+    Subscribe.objects.bulk_create(subscriptions, ignore_conflicts=True)
+    shopping_list.rebuild()
+    counters.reconcile()
+    feed.rebuild()
+    return user_list
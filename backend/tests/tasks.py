@@ -0,0 +1,20 @@
+"""Задачи очереди для тестов: регистрируются при импорте модуля."""
+import time
+
+from jobs.queue import task
+
+calls = []
+
+
+@task('tests.record')
+def record(value, fail_times=0):
+    calls.append(value)
+    if calls.count(value) <= fail_times:
+        raise RuntimeError('сбой')
+    return value
+
+
+@task('tests.sleep', atomic=False)
+def sleep(seconds):
+    time.sleep(seconds)
+    return seconds
@@ -0,0 +1,139 @@
+"""Пакетные избранное, корзина и подписки."""
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from recipes import counters, shopping_list
+from recipes.models import FeedItem, Recipe, ShoppingCart
+from users.models import Subscribe, User
+from .dataset import seed_dataset
+
+
+class BatchRelationTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = seed_dataset(users=8, recipes=20, ingredients=30)
+        cls.user = User.objects.create(
+            username='batch', email='batch@example.com'
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        cls.recipe_ids = list(
+            Recipe.objects.order_by('id').values_list('id', flat=True)[:5]
+        )
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def assert_counters_match(self):
+        self.assertEqual(set(counters.reconcile().values()), {0})
+
+    def batch(self, method, url, ids, queries=None):
+        request = getattr(self.client, method)
+        if queries is None:
+            return request(url, {'ids': ids}, format='json')
+        with self.assertNumQueries(queries):
+            return request(url, {'ids': ids}, format='json')
+
+    def test_favorite(self):
+        first, second, *rest = self.recipe_ids
+        self.client.post(f'/api/recipes/{first}/favorite/')
+        response = self.batch(
+            'post', '/api/recipes/favorite/', [first, second, second, 0]
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.batch(
+            'post', '/api/recipes/favorite/', [first, second, 10 ** 6], 6
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['results'], {
+            str(first): 'exists',
+            str(second): 'created',
+            str(10 ** 6): 'not_found',
+        })
+        self.assert_counters_match()
+        response = self.batch(
+            'delete', '/api/recipes/favorite/', [first, rest[0]], 6
+        )
+        self.assertEqual(response.json()['results'], {
+            str(first): 'deleted', str(rest[0]): 'absent',
+        })
+        self.assertEqual(
+            list(self.user.favorite.values_list('recipe_id', flat=True)),
+            [second],
+        )
+        self.assert_counters_match()
+
+    def test_shopping_cart(self):
+        response = self.batch(
+            'post', '/api/recipes/shopping_cart/', self.recipe_ids
+        )
+        self.assertEqual(
+            set(response.json()['results'].values()), {'created'}
+        )
+        self.assertEqual(
+            ShoppingCart.objects.filter(user=self.user).count(),
+            len(self.recipe_ids),
+        )
+        self.assertEqual(shopping_list.verify(), {})
+        self.batch(
+            'delete', '/api/recipes/shopping_cart/', self.recipe_ids[:3]
+        )
+        self.assertEqual(
+            ShoppingCart.objects.filter(user=self.user).count(), 2
+        )
+        self.assertEqual(shopping_list.verify(), {})
+
+    def test_subscribe(self):
+        author_ids = [user.id for user in self.users[:3]]
+        response = self.batch(
+            'post', '/api/users/subscribe/', author_ids + [self.user.id]
+        )
+        self.assertEqual(response.json()['results'][str(self.user.id)],
+                         'not_found')
+        self.assertEqual(
+            set(Subscribe.objects.filter(user=self.user)
+                .values_list('author_id', flat=True)),
+            set(author_ids),
+        )
+        self.assertEqual(
+            set(FeedItem.objects.filter(user=self.user)
+                .values_list('recipe_id', flat=True)),
+            set(Recipe.objects.filter(author_id__in=author_ids)
+                .values_list('id', flat=True)),
+        )
+        self.assert_counters_match()
+        self.batch('delete', '/api/users/subscribe/', author_ids)
+        self.assertFalse(Subscribe.objects.filter(user=self.user).exists())
+        self.assertFalse(FeedItem.objects.filter(user=self.user).exists())
+        self.assert_counters_match()
+
+    def test_repeated_single_writes(self):
+        recipe_id = self.recipe_ids[0]
+        for url in (f'/api/recipes/{recipe_id}/favorite/',
+                    f'/api/recipes/{recipe_id}/shopping_cart/',
+                    f'/api/users/{self.users[1].id}/subscribe/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.post(url).status_code,
+                                 status.HTTP_201_CREATED)
+                response = self.client.post(url)
+                self.assertEqual(response.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+                self.assertIn('non_field_errors', response.data)
+                self.assertEqual(self.client.delete(url).status_code,
+                                 status.HTTP_204_NO_CONTENT)
+                self.assertEqual(self.client.delete(url).status_code,
+                                 status.HTTP_404_NOT_FOUND)
+        self.assert_counters_match()
+        self.assertEqual(shopping_list.verify(), {})
+
+    def test_single_write_errors(self):
+        for url in ('/api/recipes/1000000/favorite/',
+                    '/api/recipes/1000000/shopping_cart/',
+                    '/api/users/1000000/subscribe/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.post(url).status_code,
+                                 status.HTTP_404_NOT_FOUND)
+        response = self.client.post(f'/api/users/{self.user.id}/subscribe/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Subscribe.objects.filter(user=self.user).exists())
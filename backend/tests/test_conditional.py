@@ -0,0 +1,93 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.ingredient_index import ingredient_index
+from recipes.models import Favorite, Ingredient, Recipe, Tag
+from .dataset import seed_dataset
+
+
+class ConditionalGetTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_dataset(users=6, recipes=12, ingredients=20)[0]
+        ingredient_index.rebuild()
+
+    def assert_not_modified(self, url, queries, **headers):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **headers)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        return etag
+
+    def test_tags(self):
+        etag = self.assert_not_modified('/api/tags/', 1)
+        Tag.objects.filter(slug='dinner').update(name='Полдник')
+        self.assertNotEqual(self.client.get('/api/tags/')['ETag'], etag)
+
+    def test_ingredients(self):
+        url = '/api/ingredients/?name=ингредиент'
+        etag = self.assert_not_modified(url, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(
+                name='ингредиент Б', measurement_unit='г'
+            )
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+
+    def test_recipe_detail_anonymous(self):
+        recipe = Recipe.objects.first()
+        url = f'/api/recipes/{recipe.id}/'
+        self.assert_not_modified(url, 1)
+        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_recipe_detail_depends_on_user_flags(self):
+        self.client.force_authenticate(self.user)
+        recipe = Recipe.objects.exclude(favorite__user=self.user).first()
+        url = f'/api/recipes/{recipe.id}/'
+        etag = self.assert_not_modified(url, 1)
+        self.assertFalse(self.client.get(url).has_header('Last-Modified'))
+        Favorite.objects.create(user=self.user, recipe=recipe)
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+
+    def test_recipe_update_changes_etag(self):
+        recipe = Recipe.objects.first()
+        url = f'/api/recipes/{recipe.id}/'
+        etag = self.client.get(url)['ETag']
+        recipe.name = 'Другое название'
+        recipe.save()
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+
+    def test_related_rows_change_etag(self):
+        recipe = Recipe.objects.first()
+        url = f'/api/recipes/{recipe.id}/'
+        tag = recipe.tags.first()
+        ingredient = recipe.ingredients.first()
+        author = recipe.author
+        tag.color = '#000000'
+        ingredient.measurement_unit = 'кг'
+        author.first_name = 'Другое имя'
+        changes = (
+            tag.save,
+            ingredient.save,
+            lambda: author.save(update_fields=['first_name']),
+            tag.delete,
+        )
+        for change in changes:
+            etag = self.client.get(url)['ETag']
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            self.assertNotEqual(self.client.get(url)['ETag'], etag)
+
+    def test_login_keeps_etag(self):
+        recipe = Recipe.objects.first()
+        url = f'/api/recipes/{recipe.id}/'
+        etag = self.client.get(url)['ETag']
+        recipe.author.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get(url)['ETag'], etag)
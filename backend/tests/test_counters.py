@@ -0,0 +1,82 @@
+"""Денормализованные счётчики и их сверка."""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from recipes import counters
+from recipes.models import Favorite, FavoriteCounterShard, Recipe
+from users.models import Subscribe, User
+from .dataset import seed_dataset
+from .test_query_budgets import IMAGE
+
+
+class CounterTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = seed_dataset(users=6, recipes=12, ingredients=20)
+        cls.user = User.objects.create(
+            username='counter', email='counter@example.com'
+        )
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def assert_counters_match(self):
+        for recipe in Recipe.objects.all():
+            self.assertEqual(
+                recipe.favorites_count,
+                Favorite.objects.filter(recipe=recipe).count(),
+            )
+        for user in User.objects.all():
+            self.assertEqual(user.recipes_count, user.recipes.count())
+            self.assertEqual(
+                user.subscribers_count, user.subscribed.count()
+            )
+
+    def test_actions_keep_counters(self):
+        recipe = Recipe.objects.exclude(favorite__user=self.user).first()
+        author = self.users[2]
+        self.client.post(f'/api/recipes/{recipe.id}/favorite/')
+        self.client.post(f'/api/users/{author.id}/subscribe/')
+        response = self.client.post('/api/recipes/', {
+            'ingredients': [{'id': 1, 'amount': 10}],
+            'tags': [1],
+            'image': IMAGE,
+            'name': 'Рецепт со счётчиком',
+            'text': 'Описание',
+            'cooking_time': 5,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assert_counters_match()
+        self.client.delete(f'/api/recipes/{recipe.id}/favorite/')
+        self.client.delete(f'/api/users/{author.id}/subscribe/')
+        self.client.delete(f'/api/recipes/{response.data["id"]}/')
+        self.assert_counters_match()
+
+    def test_reconcile_repairs_drift(self):
+        Recipe.objects.update(favorites_count=100)
+        User.objects.update(recipes_count=0, subscribers_count=7)
+        Subscribe.objects.filter(author=self.users[1]).delete()
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assert_counters_match()
+
+    @override_settings(FAVORITE_COUNTER_SHARDS=4, FAVORITE_COUNTER_HOT=0)
+    def test_sharded_favorites(self):
+        recipe = Recipe.objects.exclude(favorite__user=self.user).first()
+        before = recipe.favorites_count
+        self.client.post(f'/api/recipes/{recipe.id}/favorite/')
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, before)
+        self.assertTrue(
+            FavoriteCounterShard.objects.filter(recipe=recipe).exists()
+        )
+        counters.fold_shards()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, before + 1)
+        self.assertFalse(FavoriteCounterShard.objects.exists())
@@ -0,0 +1,23 @@
+"""Команда explain_hot_paths."""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from .dataset import seed_dataset
+
+
+class ExplainHotPathsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset(users=10, recipes=30, ingredients=40)
+
+    def test_reports_every_path(self):
+        stdout = StringIO()
+        call_command('explain_hot_paths', verbose_plans=True, stdout=stdout)
+        output = stdout.getvalue()
+        for name in ('recipes:', 'recipes?author:', 'recipes?tags:',
+                     'recipes?is_favorited:', 'recipes/feed:',
+                     'download_shopping_cart:', 'users/subscriptions:'):
+            self.assertIn(name, output)
@@ -0,0 +1,149 @@
+"""Лента подписок: раскладка при публикации, подписке и отписке."""
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from recipes import counters, feed
+from recipes.models import FeedItem, Recipe
+from users.models import Subscribe, User
+from .dataset import seed_dataset
+from .test_query_budgets import IMAGE
+
+
+class FeedTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = seed_dataset(users=6, recipes=12, ingredients=20)
+        cls.reader = User.objects.create(
+            username='reader', email='reader@example.com'
+        )
+        cls.author = cls.users[1]
+        cls.token = Token.objects.create(user=cls.reader)
+        cls.author_token = Token.objects.create(user=cls.author)
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def feed_ids(self, url='/api/recipes/feed/?limit=50'):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [recipe['id'] for recipe in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def author_recipes(self):
+        return list(
+            Recipe.objects.filter(author=self.author)
+            .order_by('-pub_date', '-id').values_list('id', flat=True)
+        )
+
+    def publish(self):
+        author = self.client_class()
+        author.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.author_token.key}'
+        )
+        response = author.post('/api/recipes/', {
+            'ingredients': [{'id': 1, 'amount': 10}],
+            'tags': [1],
+            'image': IMAGE,
+            'name': 'Свежий рецепт',
+            'text': 'Описание',
+            'cooking_time': 5,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def subscribe(self):
+        response = self.client.post(f'/api/users/{self.author.id}/subscribe/')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_requires_authentication(self):
+        response = self.client_class().get('/api/recipes/feed/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_subscribe_backfills_and_unsubscribe_cleans_up(self):
+        self.assertEqual(self.feed_ids(), [])
+        self.subscribe()
+        self.assertEqual(self.feed_ids(), self.author_recipes())
+        self.client.delete(f'/api/users/{self.author.id}/subscribe/')
+        self.assertEqual(self.feed_ids(), [])
+        self.assertFalse(FeedItem.objects.filter(user=self.reader).exists())
+
+    def test_publish_fans_out(self):
+        self.subscribe()
+        recipe_id = self.publish()
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.reader, recipe_id=recipe_id
+        ).exists())
+        self.assertEqual(self.feed_ids()[0], recipe_id)
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_popular_author_is_read_on_demand(self):
+        Subscribe.objects.get_or_create(user=self.users[2], author=self.author)
+        Subscribe.objects.get_or_create(user=self.users[3], author=self.author)
+        counters.reconcile()
+        self.subscribe()
+        recipe_id = self.publish()
+        self.assertFalse(FeedItem.objects.filter(
+            recipe__author=self.author
+        ).filter(recipe_id=recipe_id).exists())
+        self.assertEqual(self.feed_ids(), self.author_recipes())
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_author_below_limit_is_pushed_again(self):
+        Subscribe.objects.filter(author=self.author).delete()
+        follower = self.users[2]
+        Subscribe.objects.create(user=follower, author=self.author)
+        counters.reconcile()
+        self.subscribe()
+        self.client.delete(f'/api/users/{self.author.id}/subscribe/')
+        self.assertEqual(
+            set(FeedItem.objects.filter(
+                user=follower, recipe__author=self.author
+            ).values_list('recipe_id', flat=True)),
+            set(self.author_recipes()),
+        )
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_pages_merge_pushed_and_pulled(self):
+        pushed_author = User.objects.filter(
+            recipes__isnull=False
+        ).exclude(pk=self.author.pk).first()
+        Subscribe.objects.filter(author=pushed_author).delete()
+        Subscribe.objects.get_or_create(user=self.users[3], author=self.author)
+        Subscribe.objects.get_or_create(user=self.users[4], author=self.author)
+        counters.reconcile()
+        self.subscribe()
+        self.client.post(f'/api/users/{pushed_author.id}/subscribe/')
+        self.assertTrue(FeedItem.objects.filter(user=self.reader).exists())
+        expected = list(
+            Recipe.objects.filter(author__in=(self.author, pushed_author))
+            .order_by('-pub_date', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(
+            self.feed_ids('/api/recipes/feed/?limit=2'), expected
+        )
+
+    def test_filtered_feed(self):
+        self.subscribe()
+        recipe = Recipe.objects.filter(author=self.author).first()
+        tag = recipe.tags.first()
+        expected = list(
+            Recipe.objects.filter(author=self.author, tags=tag)
+            .order_by('-pub_date', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(
+            self.feed_ids(f'/api/recipes/feed/?limit=1&tags={tag.slug}'),
+            expected,
+        )
+
+    def test_rebuild(self):
+        self.subscribe()
+        fields = ('user_id', 'recipe_id', 'pub_date')
+        before = set(FeedItem.objects.values_list(*fields))
+        feed.rebuild()
+        self.assertEqual(set(FeedItem.objects.values_list(*fields)), before)
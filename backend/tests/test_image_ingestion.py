@@ -0,0 +1,80 @@
+"""Приём фотографий рецептов в base64."""
+import os
+from base64 import b64encode
+from io import BytesIO
+
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+
+from api.fields import ContentHashImageField
+
+
+def data_uri(image, image_format='PNG', wrap=None):
+    buffer = BytesIO()
+    image.save(buffer, image_format)
+    encoded = b64encode(buffer.getvalue()).decode()
+    if wrap:
+        encoded = '\n'.join(
+            encoded[start:start + wrap]
+            for start in range(0, len(encoded), wrap)
+        )
+    return f'data:image/{image_format.lower()};base64,{encoded}'
+
+
+def noise(width, height):
+    return Image.frombytes(
+        'RGB', (width, height), os.urandom(width * height * 3)
+    )
+
+
+class ContentHashImageFieldTests(SimpleTestCase):
+
+    def setUp(self):
+        self.field = ContentHashImageField()
+
+    def test_same_image_is_stored_once(self):
+        data = data_uri(noise(64, 64))
+        name = self.field.run_validation(data)
+        self.assertRegex(name, r'^recipes/[0-9a-f]{64}\.png$')
+        modified = os.path.getmtime(default_storage.path(name))
+        self.assertEqual(self.field.run_validation(data), name)
+        self.assertEqual(
+            os.path.getmtime(default_storage.path(name)), modified
+        )
+
+    def test_decodes_across_chunks_and_line_breaks(self):
+        image = noise(300, 300)
+        name = self.field.run_validation(data_uri(image, wrap=76))
+        with Image.open(default_storage.path(name)) as stored:
+            self.assertEqual(stored.tobytes(), image.tobytes())
+
+    @override_settings(RECIPE_IMAGE_MAX_SIDE=100)
+    def test_downsizes_large_images(self):
+        name = self.field.run_validation(
+            data_uri(Image.new('RGB', (400, 200)), 'JPEG')
+        )
+        with Image.open(default_storage.path(name)) as stored:
+            self.assertEqual(stored.size, (100, 50))
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=100)
+    def test_rejects_too_many_pixels(self):
+        with self.assertRaises(ValidationError):
+            self.field.run_validation(data_uri(Image.new('RGB', (20, 20))))
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=1000)
+    def test_rejects_large_uploads(self):
+        with self.assertRaises(ValidationError):
+            self.field.run_validation(data_uri(noise(64, 64)))
+
+    def test_rejects_invalid_data(self):
+        for data in (
+            'not an image',
+            'data:image/png;base64,',
+            'data:image/png;base64,abc',
+            'data:image/png;base64,' + b64encode(b'not an image').decode(),
+        ):
+            with self.subTest(data=data):
+                with self.assertRaises(ValidationError):
+                    self.field.run_validation(data)
@@ -0,0 +1,99 @@
+"""Варианты фотографий рецептов."""
+from base64 import b64encode
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from jobs.queue import run_pending
+from recipes.models import Recipe
+from .dataset import seed_dataset
+
+
+def png(width, height):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), '#E26C2D').save(buffer, 'PNG')
+    return 'data:image/png;base64,' + b64encode(buffer.getvalue()).decode()
+
+
+class ImageVariantTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = seed_dataset(users=6, recipes=12, ingredients=20)
+        cls.token = Token.objects.create(user=cls.users[0])
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def create(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/recipes/', {
+                'ingredients': [{'id': 1, 'amount': 10}],
+                'tags': [1],
+                'image': png(1000, 500),
+                'name': 'Рецепт с фото',
+                'text': 'Описание',
+                'cooking_time': 5,
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response
+
+    def test_falls_back_to_original(self):
+        response = self.create()
+        self.assertEqual(
+            set(response.data['image_variants'].values()),
+            {response.data['image']},
+        )
+
+    def test_variants_are_built(self):
+        recipe_id = self.create().data['id']
+        etag = self.client.get(f'/api/recipes/{recipe_id}/')['ETag']
+        self.assertEqual(run_pending(), 1)
+        recipe = Recipe.objects.get(pk=recipe_id)
+        # Новые URL вариантов должны сбросить кэш клиента.
+        response = self.client.get(
+            f'/api/recipes/{recipe_id}/', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(recipe.image_variants), set(settings.RECIPE_IMAGE_VARIANTS)
+        )
+        for variant, width in settings.RECIPE_IMAGE_VARIANTS.items():
+            with Image.open(recipe.image.storage.path(
+                recipe.image_variants[variant]
+            )) as image:
+                self.assertEqual(image.format, 'WEBP')
+                self.assertEqual(image.width, width or 1000)
+        response = self.client.get(f'/api/recipes/{recipe.id}/')
+        self.assertTrue(
+            response.data['image_variants']['thumbnail'].endswith(
+                '-thumbnail.webp'
+            )
+        )
+
+    def test_variants_rebuilt_after_switching_back(self):
+        recipe_id = self.create().data['id']
+        run_pending()
+        first = png(1000, 500)
+        for image in (png(800, 400), first):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch(
+                    f'/api/recipes/{recipe_id}/', {
+                        'ingredients': [{'id': 1, 'amount': 10}],
+                        'tags': [1],
+                        'image': image,
+                        'name': 'Рецепт с фото',
+                        'text': 'Описание',
+                        'cooking_time': 5,
+                    }, format='json',
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(run_pending(), 1)
+        recipe = Recipe.objects.get(pk=recipe_id)
+        self.assertEqual(
+            set(recipe.image_variants), set(settings.RECIPE_IMAGE_VARIANTS)
+        )
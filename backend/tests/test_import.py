@@ -0,0 +1,198 @@
+"""Пакетный импорт рецептов."""
+import json
+import os
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from jobs.models import Job
+from jobs.queue import claim, enqueue, run_pending
+from recipes.importer import import_recipes
+from recipes.models import IngredientAmount, Recipe
+from users.models import User
+from .dataset import seed_dataset
+
+IMAGE = 'recipes/import.png'
+
+
+class ImportTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = seed_dataset(users=6, recipes=12, ingredients=20)
+        cls.admin = User.objects.create(
+            username='admin', email='admin@example.com', is_staff=True
+        )
+        cls.token = Token.objects.create(user=cls.admin)
+        cls.user_token = Token.objects.create(user=cls.users[1])
+        if not default_storage.exists(IMAGE):
+            default_storage.save(IMAGE, ContentFile(b'png'))
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def record(self, index, **fields):
+        record = {
+            'name': f'Импорт {index}',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': IMAGE,
+            'author': self.users[2].email,
+            'tags': ['breakfast', 2],
+            'ingredients': [
+                {'id': 1, 'amount': 100},
+                {'name': 'ингредиент 5', 'measurement_unit': 'г',
+                 'amount': 5},
+            ],
+        }
+        record.update(fields)
+        return json.dumps(record, ensure_ascii=False)
+
+    def lines(self):
+        return [
+            self.record(1),
+            self.record(2, author=None),
+            'не json',
+            self.record(4, tags=['missing']),
+            self.record(5, ingredients=[{'id': 1, 'amount': 0}]),
+            '',
+            self.record(7, image='recipes/missing.png'),
+            self.record(8, author=self.users[3].id),
+        ]
+
+    def test_import_reports_errors_by_line(self):
+        recipes_count = self.users[2].recipes.count()
+        report = import_recipes(self.lines(), author=self.admin, chunk_size=3)
+        self.assertEqual(report['created'], 3)
+        self.assertEqual(
+            [row['line'] for row in report['errors']], [3, 4, 5, 7]
+        )
+        recipe = Recipe.objects.get(name='Импорт 1')
+        self.assertEqual(
+            set(recipe.tags.values_list('slug', flat=True)),
+            {'breakfast', 'dinner'},
+        )
+        self.assertEqual(
+            dict(IngredientAmount.objects.filter(recipe=recipe)
+                 .values_list('ingredient__name', 'amount')),
+            {'ингредиент 0': 100, 'ингредиент 5': 5},
+        )
+        self.assertEqual(
+            Recipe.objects.get(name='Импорт 2').author, self.admin
+        )
+        self.users[2].refresh_from_db()
+        self.assertEqual(self.users[2].recipes_count, recipes_count + 1)
+
+    def test_malformed_references_reported(self):
+        malformed = [
+            {'tags': 5},
+            {'tags': [{'a': 1}]},
+            {'author': [1]},
+            {'author': {'email': 'x'}},
+            {'ingredients': {'id': 1}},
+            {'ingredients': [{'name': ['a'], 'amount': 1}]},
+            {'ingredients': [{'id': [1], 'measurement_unit': {}}]},
+        ]
+        lines = [self.record(1)] + [
+            self.record(index, **fields)
+            for index, fields in enumerate(malformed, start=2)
+        ]
+        report = import_recipes(lines, author=self.admin)
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(
+            [row['line'] for row in report['errors']],
+            list(range(2, len(malformed) + 2)),
+        )
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson',
+                                         delete=False) as file:
+            file.write('\n'.join(self.lines()))
+        self.addCleanup(os.unlink, file.name)
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_recipes', file.name, author=self.admin.email,
+                     stdout=stdout, stderr=stderr)
+        self.assertIn('Импортировано рецептов: 3', stdout.getvalue())
+        self.assertIn('Строка 4', stderr.getvalue())
+
+    def test_endpoint(self):
+        response = self.client.post(
+            '/api/recipes/import/', '\n'.join(self.lines()),
+            content_type='application/x-ndjson',
+            HTTP_IDEMPOTENCY_KEY='batch-1',
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertTrue(
+            response['Location'].endswith(f'/api/jobs/{response.data["id"]}/')
+        )
+        repeated = self.client.post(
+            '/api/recipes/import/', '\n'.join(self.lines()),
+            content_type='application/x-ndjson',
+            HTTP_IDEMPOTENCY_KEY='batch-1',
+        )
+        self.assertEqual(repeated.data['id'], response.data['id'])
+        self.assertEqual(
+            Job.objects.get(pk=response.data['id']).max_attempts, 1
+        )
+        run_pending()
+        job = Job.objects.get(pk=response.data['id'])
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.result['created'], 3)
+
+    def test_failed_import_is_not_retried(self):
+        response = self.client.post(
+            '/api/recipes/import/', '\n'.join(self.lines()),
+            content_type='application/x-ndjson',
+        )
+        failing = mock.patch(
+            'recipes.tasks.import_recipes', side_effect=RuntimeError
+        )
+        with failing, self.assertLogs('jobs.queue', 'ERROR'):
+            run_pending()
+        job = Job.objects.get(pk=response.data['id'])
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 1)
+        self.assertFalse(default_storage.exists(job.payload['path']))
+
+    def test_endpoint_is_admin_only(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.user_token.key}'
+        )
+        response = self.client.post(
+            '/api/recipes/import/', self.record(1),
+            content_type='application/x-ndjson',
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(JOB_HEARTBEAT=0.05, JOB_TIMEOUT=0.2)
+class LongImportTests(TransactionTestCase):
+
+    def test_long_import_is_not_claimed_twice(self):
+        path = default_storage.save(
+            'imports/long.ndjson', ContentFile(b'{}\n')
+        )
+        job = enqueue('recipes.import', {'path': path}, max_attempts=1)
+        reclaimed = []
+
+        def slow_import(file, author):
+            time.sleep(0.5)
+            reclaimed.append(claim())
+            return {'created': 0, 'errors': []}
+
+        with mock.patch('recipes.tasks.import_recipes', slow_import):
+            self.assertEqual(run_pending(), 1)
+        self.assertEqual(reclaimed, [None])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertFalse(default_storage.exists(path))
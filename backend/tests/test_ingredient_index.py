@@ -0,0 +1,83 @@
+from django.db import DatabaseError, transaction
+from django.test import TestCase
+
+from api.ingredient_index import ingredient_index
+from recipes.models import Ingredient
+
+
+class IngredientIndexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г')
+            for name in (
+                'Сахар',
+                'сахарная пудра',
+                'ванильный сахар',
+                'соль',
+                'тростниковый сахар',
+                'Ёжевика',
+            )
+        )
+        ingredient_index.rebuild()
+
+    def names(self, query, limit=50):
+        return [
+            ingredient['name']
+            for ingredient in ingredient_index.search(query, limit)
+        ]
+
+    def test_prefix_matches_come_first(self):
+        self.assertEqual(
+            self.names('сах'),
+            [
+                'Сахар',
+                'сахарная пудра',
+                'ванильный сахар',
+                'тростниковый сахар',
+            ],
+        )
+
+    def test_limit(self):
+        self.assertEqual(self.names('сах', limit=1), ['Сахар'])
+        self.assertEqual(len(self.names('', limit=3)), 3)
+
+    def test_case_insensitive(self):
+        self.assertEqual(self.names('ЁЖ'), ['Ёжевика'])
+        self.assertEqual(self.names('нет такого'), [])
+
+    def test_rebuilt_after_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(name='сахарин', measurement_unit='г')
+            Ingredient.objects.filter(name='соль').get().delete()
+        self.assertIn('сахарин', self.names('сахари'))
+        self.assertEqual(self.names('соль'), [])
+
+    def test_endpoint(self):
+        response = self.client.get('/api/ingredients/?name=соль')
+        self.assertEqual(
+            response.json(),
+            [{
+                'id': Ingredient.objects.get(name='соль').id,
+                'name': 'соль',
+                'measurement_unit': 'г',
+            }],
+        )
+
+    def test_rebuild_scheduled_once_per_transaction(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            for _ in range(3):
+                ingredient_index.schedule_rebuild()
+        self.assertEqual(len(callbacks), 1)
+
+    def test_rebuild_scheduled_after_rollback(self):
+        try:
+            with transaction.atomic():
+                ingredient_index.schedule_rebuild()
+                raise DatabaseError
+        except DatabaseError:
+            pass
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(name='сахарин', measurement_unit='г')
+        self.assertEqual(self.names('сахари'), ['сахарин'])
@@ -0,0 +1,143 @@
+"""Очередь фоновых задач."""
+import threading
+import time
+from datetime import timedelta
+
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from jobs.models import Job
+from jobs.queue import TASKS, beat, claim, enqueue, run, run_pending
+from users.models import User
+from .tasks import calls
+
+
+@override_settings(JOB_RETRY_DELAY=0)
+class QueueTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_runs_by_priority(self):
+        enqueue('tests.record', {'value': 'low'})
+        enqueue('tests.record', {'value': 'high'}, priority=10)
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(calls, ['high', 'low'])
+        self.assertEqual(
+            set(Job.objects.values_list('status', flat=True)), {Job.DONE}
+        )
+
+    def test_retries_then_fails(self):
+        retried = enqueue('tests.record', {'value': 'a', 'fail_times': 1})
+        failed = enqueue(
+            'tests.record', {'value': 'b', 'fail_times': 5}, max_attempts=2
+        )
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            run_pending()
+        retried.refresh_from_db()
+        failed.refresh_from_db()
+        self.assertEqual((retried.status, retried.attempts), (Job.DONE, 2))
+        self.assertEqual(retried.result, 'a')
+        self.assertEqual((failed.status, failed.attempts), (Job.FAILED, 2))
+        self.assertIn('RuntimeError', failed.error)
+
+    def test_idempotency_key(self):
+        first = enqueue('tests.record', {'value': 1}, idempotency_key='k')
+        second = enqueue('tests.record', {'value': 2}, idempotency_key='k')
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_claim_is_exclusive_and_reclaims_stale(self):
+        job = enqueue('tests.record', {'value': 1})
+        self.assertEqual(claim().id, job.id)
+        self.assertIsNone(claim())
+        Job.objects.filter(id=job.id).update(
+            locked_at=timezone.now() - timedelta(days=1)
+        )
+        self.assertEqual(claim().attempts, 2)
+
+    def test_stale_job_without_attempts_fails(self):
+        job = enqueue('tests.record', {'value': 1}, max_attempts=1)
+        self.assertEqual(claim().id, job.id)
+        Job.objects.filter(id=job.id).update(
+            locked_at=timezone.now() - timedelta(days=1)
+        )
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertIsNone(claim())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 1)
+
+    def test_beat_extends_lock(self):
+        enqueue('tests.record', {'value': 1})
+        job = claim()
+        Job.objects.filter(id=job.id).update(
+            locked_at=timezone.now() - timedelta(days=1)
+        )
+        job.refresh_from_db()
+        self.assertTrue(beat(job))
+        self.assertIsNone(claim())
+        self.assertTrue(run(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+
+    def test_unknown_task(self):
+        with self.assertRaises(KeyError):
+            enqueue('tests.missing')
+        self.assertNotIn('tests.missing', TASKS)
+
+
+@override_settings(JOB_HEARTBEAT=0.05, JOB_TIMEOUT=0.2)
+class HeartbeatTests(TransactionTestCase):
+
+    def test_long_task_is_not_reclaimed(self):
+        job = enqueue('tests.sleep', {'seconds': 0.6})
+        claimed = claim()
+
+        def work():
+            try:
+                run(claimed)
+            finally:
+                connections.close_all()
+
+        worker = threading.Thread(target=work)
+        worker.start()
+        time.sleep(0.4)
+        self.assertIsNone(claim())
+        worker.join()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+
+
+class JobStatusTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='jobs', email='j@example.com')
+        cls.other = User.objects.create(username='other', email='o@e.com')
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_status(self):
+        job = enqueue('tests.record', {'value': 7}, user=self.user)
+        response = self.client.get(f'/api/jobs/{job.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], Job.QUEUED)
+        run_pending()
+        response = self.client.get(f'/api/jobs/{job.id}/')
+        self.assertEqual(
+            (response.data['status'], response.data['result']),
+            (Job.DONE, 7),
+        )
+
+    def test_foreign_job_is_hidden(self):
+        job = enqueue('tests.record', {'value': 1}, user=self.other)
+        response = self.client.get(f'/api/jobs/{job.id}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,127 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from recipes.management.commands import load_ingrs
+from recipes.models import Ingredient, Tag
+
+INGREDIENTS = [
+    ('абрикосы', 'г'),
+    ('молоко', 'мл'),
+    ('молоко', 'г'),
+    ('соль', 'по вкусу'),
+]
+
+
+class LoadIngredientsTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def write_csv(self, rows):
+        return self.write('ingredients.csv', ''.join(
+            f'{name},{unit}\n' for name, unit in rows
+        ))
+
+    def write_json(self, rows):
+        return self.write('ingredients.json', json.dumps(
+            [{'name': name, 'measurement_unit': unit} for name, unit in rows],
+            ensure_ascii=False, indent=1,
+        ))
+
+    def load(self, path):
+        output = StringIO()
+        call_command('load_ingrs', path, stdout=output)
+        return output.getvalue()
+
+    def loaded(self):
+        return set(Ingredient.objects.values_list('name', 'measurement_unit'))
+
+    def test_csv(self):
+        output = self.load(self.write_csv(INGREDIENTS))
+        self.assertEqual(self.loaded(), set(INGREDIENTS))
+        self.assertIn('Строк: 4, новых: 4', output)
+
+    def test_json(self):
+        self.load(self.write_json(INGREDIENTS))
+        self.assertEqual(self.loaded(), set(INGREDIENTS))
+
+    def test_json_records_across_chunks(self):
+        path = self.write_json(INGREDIENTS)
+        for size in (1, 7, 16):
+            with self.subTest(read_size=size):
+                with mock.patch.object(load_ingrs, 'READ_SIZE', size):
+                    with open(path, encoding='utf-8') as file:
+                        rows = list(load_ingrs.read_json(file))
+                self.assertEqual(rows, INGREDIENTS)
+
+    def test_broken_json(self):
+        for content in ('{"name": "соль"}', '[{"name": "соль", "meas'):
+            with self.subTest(content=content):
+                with self.assertRaises(CommandError):
+                    self.load(self.write('broken.json', content))
+        self.assertFalse(Ingredient.objects.exists())
+
+    def test_malformed_json_record(self):
+        records = (
+            '"соль"',
+            '{"name": "соль"}',
+            '{"name": ["соль"], "measurement_unit": "г"}',
+        )
+        for record in records:
+            with self.subTest(record=record):
+                path = self.write(
+                    'broken.json',
+                    f'[{{"name": "сахар", "measurement_unit": "г"}}, '
+                    f'{record}]',
+                )
+                with self.assertRaisesMessage(CommandError, 'Запись 2'):
+                    self.load(path)
+        self.assertFalse(Ingredient.objects.exists())
+
+    def test_malformed_csv_row(self):
+        path = self.write('broken.csv', 'сахар,г\n\nсоль\n')
+        with self.assertRaisesMessage(CommandError, 'Строка 3'):
+            self.load(path)
+        self.assertFalse(Ingredient.objects.exists())
+
+    def test_duplicates_in_file(self):
+        rows = INGREDIENTS + [(' молоко ', 'мл '), ('абрикосы', 'г')]
+        output = self.load(self.write_csv(rows))
+        self.assertEqual(self.loaded(), set(INGREDIENTS))
+        self.assertIn('Строк: 4, новых: 4', output)
+
+    def test_second_run_creates_nothing(self):
+        path = self.write_json(INGREDIENTS)
+        self.load(path)
+        output = self.load(path)
+        self.assertEqual(Ingredient.objects.count(), len(INGREDIENTS))
+        self.assertIn('Строк: 4, новых: 0', output)
+
+    def test_unsupported_extension(self):
+        with self.assertRaises(CommandError):
+            self.load(self.write('ingredients.txt', 'соль,г\n'))
+
+
+class LoadTagsTests(TestCase):
+
+    def test_twice(self):
+        for _ in range(2):
+            call_command('load_tags', stdout=StringIO())
+        self.assertEqual(
+            set(Tag.objects.values_list('slug', flat=True)),
+            {'breakfast', 'dinner', 'supper'},
+        )
@@ -0,0 +1,355 @@
+"""
+Бюджеты SQL-запросов для эндпоинтов API.
+
+Каждый тест ограничивает сверху число запросов и суммарное время
+SQL на один HTTP-запрос. Для списков бюджет не должен зависеть от
+размера страницы: рост числа запросов вместе с ``limit`` означает N+1.
+
+Запуск::
+
+    python manage.py test --settings=cookingconnect.settings_test
+"""
+from contextlib import contextmanager
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from api.ingredient_index import ingredient_index
+from recipes.models import (Favorite, Recipe, ShoppingCart,
+                            ShoppingListItem)
+from users.models import Subscribe
+from .dataset import seed_dataset
+
+SQL_TIME_BUDGET = 0.5
+PAGE_SIZES = (6, 20, 50)
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=='
+)
+
+
+class QueryBudgetTestCase(APITestCase):
+    """Общий набор данных и проверка бюджета запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = seed_dataset()
+        ingredient_index.rebuild()
+        cls.user = cls.users[0]
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        self.anon = self.client_class()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    @contextmanager
+    def assert_query_budget(self, queries, sql_time=SQL_TIME_BUDGET):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = len(context.captured_queries)
+        elapsed = sum(
+            float(query['time']) for query in context.captured_queries
+        )
+        self.assertLessEqual(
+            executed, queries,
+            f'Превышен бюджет запросов: {executed} > {queries}\n'
+            + '\n'.join(query['sql'] for query in context.captured_queries),
+        )
+        self.assertLessEqual(
+            elapsed, sql_time,
+            f'Превышен бюджет времени SQL: {elapsed:.3f}s > {sql_time}s',
+        )
+
+    def get(self, client, url, queries, expected=status.HTTP_200_OK):
+        with self.assert_query_budget(queries):
+            response = client.get(url)
+        self.assertEqual(response.status_code, expected, url)
+        return response
+
+
+class RecipeBudgetTests(QueryBudgetTestCase):
+
+    def recipe_payload(self, ingredients=30):
+        return {
+            'ingredients': [
+                {'id': ingredient_id, 'amount': 10}
+                for ingredient_id in range(1, ingredients + 1)
+            ],
+            'tags': [1, 2],
+            'image': IMAGE,
+            'name': 'Новый рецепт',
+            'text': 'Описание',
+            'cooking_time': 15,
+        }
+
+    def own_recipe(self):
+        return Recipe.objects.filter(author=self.user).first()
+
+    def test_list_anonymous(self):
+        for limit in PAGE_SIZES:
+            with self.subTest(limit=limit):
+                response = self.get(
+                    self.anon, f'/api/recipes/?limit={limit}', 5
+                )
+                self.assertEqual(len(response.data['results']), limit)
+
+    def test_list_authenticated(self):
+        for limit in PAGE_SIZES:
+            with self.subTest(limit=limit):
+                response = self.get(
+                    self.client, f'/api/recipes/?limit={limit}', 7
+                )
+                self.assertEqual(len(response.data['results']), limit)
+
+    def test_list_cursor(self):
+        expected = list(
+            Recipe.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+        received = []
+        url = '/api/recipes/?limit=20&cursor='
+        while url:
+            with self.assert_query_budget(6) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertFalse(any(
+                'COUNT(' in query['sql'] for query in context.captured_queries
+            ))
+            received += [recipe['id'] for recipe in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(received, expected)
+
+    def test_feed(self):
+        expected = list(
+            Recipe.objects.filter(author__subscribed__user=self.user)
+            .order_by('-pub_date', '-id').values_list('id', flat=True)
+        )
+        received = []
+        url = '/api/recipes/feed/?limit=20'
+        while url:
+            # Авторы с fan-out on read и страница FeedItem читаются до
+            # рецептов страницы.
+            response = self.get(self.client, url, 8)
+            received += [recipe['id'] for recipe in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(received, expected)
+
+    def test_list_invalid_cursor(self):
+        self.get(
+            self.anon, '/api/recipes/?cursor=broken', 1,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+    def test_list_filtered(self):
+        for query in (
+            'is_favorited=1',
+            'is_in_shopping_cart=1',
+            'tags=breakfast',
+            f'author={self.users[1].id}',
+            'search=рецепт',
+        ):
+            with self.subTest(query=query):
+                self.get(self.client, f'/api/recipes/?{query}&limit=50', 8)
+
+    def test_detail(self):
+        recipe = Recipe.objects.first()
+        self.get(self.anon, f'/api/recipes/{recipe.id}/', 5)
+        self.get(self.client, f'/api/recipes/{recipe.id}/', 7)
+
+    # Создание и изменение также обновляют ленты, счётчики и списки
+    # покупок; число запросов не зависит от числа ингредиентов и тегов.
+    def test_create(self):
+        for ingredients in (1, 30):
+            with self.subTest(ingredients=ingredients):
+                with self.assert_query_budget(15):
+                    response = self.client.post(
+                        '/api/recipes/',
+                        self.recipe_payload(ingredients),
+                        format='json',
+                    )
+                self.assertEqual(
+                    response.status_code, status.HTTP_201_CREATED
+                )
+
+    def test_create_invalid_references(self):
+        payload = self.recipe_payload()
+        payload['tags'] = [1, 100, 101]
+        payload['ingredients'] += [
+            {'id': 10 ** 6, 'amount': 1}, {'id': 10 ** 6 + 1, 'amount': 1}
+        ]
+        with self.assert_query_budget(3):
+            response = self.client.post(
+                '/api/recipes/', payload, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data['tags']), 2)
+        self.assertEqual(len(response.data['ingredients']), 2)
+
+    def test_update(self):
+        recipe = self.own_recipe()
+        with self.assert_query_budget(23):
+            response = self.client.patch(
+                f'/api/recipes/{recipe.id}/',
+                self.recipe_payload(),
+                format='json',
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_favorite(self):
+        recipe = Recipe.objects.exclude(favorite__user=self.user).first()
+        url = f'/api/recipes/{recipe.id}/favorite/'
+        # Добавление и удаление обновляют Recipe.favorites_count.
+        with self.assert_query_budget(6):
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with self.assert_query_budget(5):
+            response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(
+            Favorite.objects.filter(user=self.user, recipe=recipe).exists()
+        )
+
+    def test_shopping_cart(self):
+        recipe = Recipe.objects.exclude(shoppingcart__user=self.user).first()
+        url = f'/api/recipes/{recipe.id}/shopping_cart/'
+        with self.assert_query_budget(8):
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with self.assert_query_budget(7):
+            response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(
+            ShoppingCart.objects.filter(user=self.user, recipe=recipe).exists()
+        )
+
+    def test_download_shopping_cart(self):
+        for export_format, content_type in (
+            ('csv', 'text/csv; charset=utf-8'),
+            ('txt', 'text/plain; charset=utf-8'),
+            ('pdf', 'application/pdf'),
+        ):
+            with self.subTest(format=export_format):
+                with self.assert_query_budget(2):
+                    response = self.client.get(
+                        '/api/recipes/download_shopping_cart/'
+                        f'?format={export_format}'
+                    )
+                    content = b''.join(response.streaming_content)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response['Content-Type'], content_type)
+                self.assertTrue(content)
+
+    def test_download_empty_shopping_cart(self):
+        ShoppingCart.objects.filter(user=self.user).delete()
+        ShoppingListItem.objects.filter(user=self.user).delete()
+        self.get(
+            self.client, '/api/recipes/download_shopping_cart/', 2,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    def test_anonymous_writes_rejected(self):
+        recipe = Recipe.objects.first()
+        for url in (
+            f'/api/recipes/{recipe.id}/favorite/',
+            f'/api/recipes/{recipe.id}/shopping_cart/',
+        ):
+            with self.subTest(url=url), self.assert_query_budget(0):
+                response = self.anon.post(url)
+            self.assertEqual(
+                response.status_code, status.HTTP_401_UNAUTHORIZED
+            )
+        self.get(
+            self.anon,
+            '/api/recipes/download_shopping_cart/',
+            0,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+
+class UserBudgetTests(QueryBudgetTestCase):
+
+    # is_subscribed берётся из одного запроса подписок на всю страницу,
+    # поэтому бюджет не зависит от limit.
+    def test_list(self):
+        for limit in PAGE_SIZES:
+            with self.subTest(limit=limit):
+                self.get(self.client, f'/api/users/?limit={limit}', 4)
+
+    def test_list_anonymous(self):
+        self.get(self.anon, '/api/users/', 0, status.HTTP_401_UNAUTHORIZED)
+
+    def test_me(self):
+        self.get(self.client, '/api/users/me/', 2)
+
+    def test_subscriptions(self):
+        for limit in PAGE_SIZES:
+            for recipes_limit in ('', '3'):
+                with self.subTest(limit=limit, recipes_limit=recipes_limit):
+                    response = self.get(
+                        self.client,
+                        f'/api/users/subscriptions/?limit={limit}'
+                        f'&recipes_limit={recipes_limit}',
+                        4,
+                    )
+                    self.assertEqual(len(response.data['results']), limit)
+
+    def test_subscriptions_recipe_previews(self):
+        for recipes_limit in (0, 2):
+            response = self.client.get(
+                '/api/users/subscriptions/?limit=50'
+                f'&recipes_limit={recipes_limit}'
+            )
+            for author in response.data['results']:
+                expected = list(
+                    Recipe.objects.filter(author_id=author['id'])
+                    .order_by('-pub_date', '-id')
+                    .values_list('id', flat=True)
+                )
+                self.assertEqual(
+                    [recipe['id'] for recipe in author['recipes']],
+                    expected[:recipes_limit],
+                )
+                self.assertEqual(author['recipes_count'], len(expected))
+                self.assertTrue(author['is_subscribed'])
+
+    def test_subscriptions_cursor(self):
+        received = []
+        url = '/api/users/subscriptions/?limit=20&cursor='
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            received += [author['id'] for author in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(
+            received,
+            list(
+                Subscribe.objects.filter(user=self.user)
+                .order_by('author_id').values_list('author_id', flat=True)
+            ),
+        )
+
+    def test_subscribe(self):
+        author = self.users[1]
+        Subscribe.objects.filter(user=self.user, author=author).delete()
+        url = f'/api/users/{author.id}/subscribe/'
+        # Подписка и отписка обновляют ленту и счётчик подписчиков.
+        with self.assert_query_budget(10):
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with self.assert_query_budget(7):
+            response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class ReferenceBudgetTests(QueryBudgetTestCase):
+
+    def test_ingredients(self):
+        for client, queries in ((self.anon, 0), (self.client, 1)):
+            self.get(client, '/api/ingredients/', queries)
+            self.get(client, '/api/ingredients/?name=ингредиент 1', queries)
+
+    def test_tags(self):
+        for client, queries in ((self.anon, 2), (self.client, 3)):
+            self.get(client, '/api/tags/', queries)
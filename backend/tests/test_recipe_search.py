@@ -0,0 +1,53 @@
+from rest_framework.test import APITestCase
+
+from recipes.models import Recipe
+from users.models import User
+
+
+class RecipeSearchTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='!'
+        )
+        for name, text in (
+            ('Борщ', 'Свёкла, капуста и картофель.'),
+            ('Салат', 'Свежая капуста с морковью.'),
+            ('Блины', 'Мука, молоко, яйца.'),
+        ):
+            Recipe.objects.create(
+                author=author,
+                name=name,
+                text=text,
+                image='recipes/seed.png',
+                cooking_time=30,
+            )
+
+    def search(self, query, **params):
+        response = self.client.get(
+            '/api/recipes/', {'search': query, **params}
+        )
+        return [recipe['name'] for recipe in response.data['results']]
+
+    def test_name_and_text(self):
+        self.assertEqual(self.search('борщ'), ['Борщ'])
+        self.assertCountEqual(self.search('капуста'), ['Борщ', 'Салат'])
+        self.assertEqual(self.search('пицца'), [])
+
+    def test_name_ranked_above_text(self):
+        Recipe.objects.filter(name='Блины').update(text='Подавать к борщу.')
+        self.assertEqual(self.search('борщ'), ['Борщ', 'Блины'])
+
+    def test_cursor_keeps_ranking(self):
+        Recipe.objects.filter(name='Блины').update(text='Подавать к борщу.')
+        self.assertEqual(
+            self.search('борщ', cursor='', limit=1), ['Борщ']
+        )
+        self.assertEqual(
+            self.search('борщ', cursor='', limit=1, page=2), ['Блины']
+        )
+
+    def test_index_follows_deletes(self):
+        Recipe.objects.filter(name='Борщ').delete()
+        self.assertEqual(self.search('борщ'), [])
@@ -0,0 +1,98 @@
+"""Обновление рецепта изменяет только то, что поменялось."""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from jobs.models import Job
+from recipes.models import IngredientAmount, Recipe
+from .dataset import seed_dataset
+from .test_image_ingestion import data_uri, noise
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class RecipeUpdateTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = seed_dataset(users=6, recipes=12, ingredients=20)
+        cls.user = cls.users[0]
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.image = data_uri(noise(32, 32))
+        response = self.client.post('/api/recipes/', self.payload(
+            {1: 10, 2: 20, 3: 30}
+        ), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.recipe = Recipe.objects.get(pk=response.data['id'])
+
+    def payload(self, amounts, tags=(1, 2)):
+        return {
+            'ingredients': [
+                {'id': ingredient_id, 'amount': amount}
+                for ingredient_id, amount in amounts.items()
+            ],
+            'tags': list(tags),
+            'image': self.image,
+            'name': 'Рецепт',
+            'text': 'Описание',
+            'cooking_time': 15,
+        }
+
+    def patch(self, payload):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(
+                f'/api/recipes/{self.recipe.id}/', payload, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(WRITES)
+        ]
+
+    def rows(self):
+        return dict(
+            IngredientAmount.objects.filter(recipe=self.recipe)
+            .values_list('ingredient_id', 'id')
+        )
+
+    def test_unchanged_payload_writes_nothing(self):
+        updated_at = self.recipe.updated_at
+        self.assertEqual(self.patch(self.payload({1: 10, 2: 20, 3: 30})), [])
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.updated_at, updated_at)
+
+    def test_only_changed_rows_are_touched(self):
+        before = self.rows()
+        self.patch(self.payload({1: 10, 2: 25, 4: 40}, tags=(2, 3)))
+        after = self.rows()
+        self.assertEqual(set(after), {1, 2, 4})
+        self.assertEqual(after[1], before[1])
+        self.assertEqual(after[2], before[2])
+        self.assertEqual(
+            IngredientAmount.objects.get(id=after[2]).amount, 25
+        )
+        self.assertEqual(
+            set(self.recipe.tags.values_list('id', flat=True)), {2, 3}
+        )
+
+    def test_same_image_is_not_rewritten(self):
+        name = self.recipe.image.name
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.patch(self.payload({1: 10, 2: 20, 3: 30}))
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image.name, name)
+        self.assertEqual(callbacks, [])
+
+    def test_new_image_schedules_variants(self):
+        self.image = data_uri(noise(32, 32))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.patch(self.payload({1: 10, 2: 20, 3: 30}))
+        self.assertTrue(Job.objects.filter(
+            name='recipes.image_variants',
+            payload__recipe_id=self.recipe.id,
+        ).exists())
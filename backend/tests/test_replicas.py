@@ -0,0 +1,67 @@
+"""Чтение с реплики и возврат к основной базе."""
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import OperationalError, connections
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from cookingconnect import replicas
+from jobs.models import Job
+from recipes.models import Tag
+from users.models import User
+from . import tasks  # noqa: F401
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(APITestCase):
+
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpTestData(cls):
+        # Разное содержимое баз показывает, откуда прочитан ответ.
+        Tag.objects.create(name='Основная', color='#E26C2D', slug='primary')
+        Tag.objects.using('replica').create(
+            name='Реплика', color='#49B64E', slug='replica'
+        )
+        cls.user = User.objects.create(
+            username='reader', email='reader@example.com'
+        )
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        caches[settings.REPLICA_STICKY_CACHE].clear()
+        replicas.unavailable.clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def tag_slugs(self, client=None):
+        response = (client or self.client).get('/api/tags/')
+        return [tag['slug'] for tag in response.data]
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.tag_slugs(), ['replica'])
+        self.assertEqual(self.tag_slugs(self.client_class()), ['replica'])
+
+    def test_writes_go_to_primary_and_stick(self):
+        response = self.client.post('/api/recipes/favorite/', {'ids': [1]},
+                                    format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.tag_slugs(), ['primary'])
+        self.assertEqual(self.tag_slugs(self.client_class()), ['replica'])
+
+    def test_unavailable_replica_falls_back_to_primary(self):
+        with mock.patch.object(
+            connections['replica'], 'ensure_connection',
+            side_effect=OperationalError,
+        ) as ensure_connection, self.assertLogs(replicas.logger):
+            self.assertEqual(self.tag_slugs(), ['primary'])
+            self.assertEqual(self.tag_slugs(), ['primary'])
+        self.assertEqual(ensure_connection.call_count, 1)
+
+    def test_other_views_read_from_primary(self):
+        job = Job.objects.create(name='tests.record', user=self.user)
+        response = self.client.get(f'/api/jobs/{job.id}/')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,74 @@
+"""Генератор синтетического набора данных."""
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TestCase
+
+from api.ingredient_index import ingredient_index
+from recipes import bench, counters, shopping_list
+from recipes.models import Favorite, IngredientAmount, Recipe
+from users.models import Subscribe, User
+
+
+class SeedBenchTests(TestCase):
+
+    def snapshot(self):
+        return (
+            sorted(Recipe.objects.values_list(
+                'name', 'author__username', 'cooking_time'
+            )),
+            sorted(IngredientAmount.objects.values_list(
+                'recipe__name', 'ingredient_id', 'amount'
+            )),
+            sorted(Subscribe.objects.values_list(
+                'user__username', 'author__username'
+            )),
+            sorted(Favorite.objects.values_list(
+                'user__username', 'recipe__name'
+            )),
+        )
+
+    def test_generate(self):
+        written = bench.generate(
+            users=50, recipes=200, favorites_per_user=5, ingredients=100
+        )
+        self.assertEqual(User.objects.count(), 50)
+        self.assertEqual(Recipe.objects.count(), 200)
+        self.assertEqual(Favorite.objects.count(), 250)
+        self.assertEqual(written['favorites'], 250)
+        self.assertLessEqual(Subscribe.objects.count(), 50 * 10)
+        # Распределение по Ципфу: самый частый ингредиент встречается
+        # заметно чаще среднего.
+        usage = list(
+            IngredientAmount.objects.order_by().values('ingredient')
+            .annotate(total=Count('id')).values_list('total', flat=True)
+        )
+        self.assertGreater(max(usage), 3 * sum(usage) / len(usage))
+        self.assertEqual(set(counters.reconcile().values()), {0})
+        self.assertEqual(shopping_list.verify(), {})
+
+    def test_ingredient_index_rebuilt(self):
+        ingredient_index.rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            bench.generate(
+                users=5, recipes=10, favorites_per_user=1, ingredients=30
+            )
+        found = ingredient_index.search('ингредиент 29', 10)
+        self.assertEqual([row['name'] for row in found], ['ингредиент 29'])
+
+    def test_deterministic(self):
+        bench.generate(users=20, recipes=50, favorites_per_user=3,
+                       ingredients=40)
+        first = self.snapshot()
+        for model in (User, Recipe):
+            model.objects.all().delete()
+        bench.generate(users=20, recipes=50, favorites_per_user=3,
+                       ingredients=40)
+        self.assertEqual(self.snapshot(), first)
+
+    def test_command(self):
+        stdout = StringIO()
+        call_command('seed_bench', users=10, recipes=20,
+                     favorites_per_user=2, ingredients=30, stdout=stdout)
+        self.assertIn('строк в минуту', stdout.getvalue())
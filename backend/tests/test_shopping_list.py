@@ -0,0 +1,172 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db.models.fields.files import FieldFile
+from rest_framework.test import APITestCase
+
+from recipes import shopping_list
+from recipes.models import (IngredientAmount, Recipe, ShoppingCart,
+                            ShoppingListItem)
+from users.models import User
+from .dataset import seed_dataset
+from .test_query_budgets import IMAGE
+
+
+def form_data(form):
+    return {
+        field.html_name: field.value()
+        for field in form
+        if field.value() is not None
+        and not isinstance(field.value(), FieldFile)
+    }
+
+
+def admin_change_data(response):
+    """POST-данные формы изменения в админке вместе с инлайнами."""
+    data = form_data(response.context['adminform'].form)
+    for inline in response.context['inline_admin_formsets']:
+        data.update(form_data(inline.formset.management_form))
+        for form in inline.formset:
+            data.update(form_data(form))
+    return data
+
+
+class ShoppingListTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = seed_dataset(users=5, recipes=20, ingredients=30)
+
+    def setUp(self):
+        self.user = self.users[0]
+        self.client.force_authenticate(self.user)
+
+    def assert_consistent(self):
+        self.assertEqual(shopping_list.verify(), {})
+
+    def recipe_outside_cart(self):
+        return Recipe.objects.exclude(shoppingcart__user=self.user).first()
+
+    def test_cart_add_and_remove(self):
+        recipe = self.recipe_outside_cart()
+        url = f'/api/recipes/{recipe.id}/shopping_cart/'
+        self.client.post(url)
+        self.assert_consistent()
+        self.client.delete(url)
+        self.assert_consistent()
+
+    def test_recipe_ingredients_change(self):
+        recipe = Recipe.objects.filter(shoppingcart__user=self.user).first()
+        self.client.force_authenticate(recipe.author)
+        amounts = list(recipe.ingredient_amount.all()[:2])
+        response = self.client.patch(
+            f'/api/recipes/{recipe.id}/',
+            {
+                'ingredients': [
+                    {'id': amounts[0].ingredient_id, 'amount': 999},
+                    {'id': amounts[1].ingredient_id, 'amount': 1},
+                    {'id': 30, 'amount': 5},
+                ],
+                'tags': [1],
+                'image': IMAGE,
+                'name': 'Новое название',
+                'text': 'Новое описание',
+                'cooking_time': 10,
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assert_consistent()
+
+    def test_recipe_delete(self):
+        recipe = Recipe.objects.filter(shoppingcart__user=self.user).first()
+        self.client.force_authenticate(recipe.author)
+        self.client.delete(f'/api/recipes/{recipe.id}/')
+        self.assert_consistent()
+
+    def test_author_delete(self):
+        recipe = Recipe.objects.filter(shoppingcart__user=self.user).exclude(
+            author=self.user
+        ).first()
+        recipe.author.delete()
+        self.assertFalse(Recipe.objects.filter(pk=recipe.pk).exists())
+        self.assert_consistent()
+
+    def admin_client(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'admin'
+        )
+        self.client.force_login(admin)
+        return self.client
+
+    def test_admin_ingredients_inline(self):
+        recipe = Recipe.objects.filter(shoppingcart__user=self.user).first()
+        url = f'/admin/recipes/recipe/{recipe.id}/change/'
+        client = self.admin_client()
+        data = admin_change_data(client.get(url))
+        prefix = next(
+            key[:-len('-0-amount')] for key in data
+            if key.endswith('-0-amount')
+        )
+        data[f'{prefix}-0-amount'] = 999
+        data[f'{prefix}-1-DELETE'] = 'on'
+        response = client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            recipe.ingredient_amount.filter(amount=999).count(), 1
+        )
+        self.assert_consistent()
+
+    def test_admin_recipe_delete(self):
+        recipe = Recipe.objects.filter(shoppingcart__user=self.user).first()
+        response = self.admin_client().post(
+            f'/admin/recipes/recipe/{recipe.id}/delete/', {'post': 'yes'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Recipe.objects.filter(pk=recipe.pk).exists())
+        self.assert_consistent()
+
+    def test_admin_cart_changes(self):
+        client = self.admin_client()
+        cart = ShoppingCart.objects.filter(user=self.user).first()
+        recipe = self.recipe_outside_cart()
+        response = client.post(
+            f'/admin/recipes/shoppingcart/{cart.id}/change/',
+            {'user': self.user.id, 'recipe': recipe.id},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assert_consistent()
+        response = client.post('/admin/recipes/shoppingcart/', {
+            'action': 'delete_selected',
+            '_selected_action': list(
+                ShoppingCart.objects.filter(user=self.user)
+                .values_list('id', flat=True)
+            ),
+            'post': 'yes',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(ShoppingCart.objects.filter(user=self.user).exists())
+        self.assert_consistent()
+
+    def test_download_reads_aggregate(self):
+        item = ShoppingListItem.objects.filter(user=self.user).first()
+        response = self.client.get(
+            '/api/recipes/download_shopping_cart/?format=txt'
+        )
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn(
+            f'{item.ingredient.name} ({item.ingredient.measurement_unit})'
+            f' — {item.amount}',
+            content,
+        )
+
+    def test_rebuild_command(self):
+        IngredientAmount.objects.filter(
+            recipe__shoppingcart__user=self.user
+        ).update(amount=1)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_shopping_lists', verify=True,
+                         stdout=StringIO())
+        call_command('rebuild_shopping_lists', stdout=StringIO())
+        call_command('rebuild_shopping_lists', verify=True, stdout=StringIO())
+        self.assert_consistent()
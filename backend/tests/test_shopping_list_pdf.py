@@ -0,0 +1,27 @@
+import re
+
+from django.test import SimpleTestCase
+
+from api.utils import shopping_list_pdf
+
+
+def shopping_rows(count):
+    return (
+        {
+            'ingredient__name': f'молоко (цельное) {index}',
+            'ingredient__measurement_unit': 'мл',
+            'amount': index,
+        }
+        for index in range(count)
+    )
+
+
+class ShoppingListPDFTests(SimpleTestCase):
+
+    def test_long_list(self):
+        data = shopping_list_pdf(shopping_rows(2200)).read()
+        self.assertTrue(data.startswith(b'%PDF-'))
+        self.assertTrue(data.endswith(b'%%EOF\n'))
+        pages = len(re.findall(rb'/Type /Page\b(?!s)', data))
+        self.assertGreater(pages, 40)
+        self.assertIn(b'/Count %d' % pages, data)
@@ -0,0 +1,61 @@
+"""Кеш подписок: один запрос на страницу и сброс при подписке."""
+from django.conf import settings
+from django.core.cache import caches
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from users.models import Subscribe
+from .dataset import seed_dataset
+
+CACHES = {
+    **settings.CACHES,
+    'subscriptions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test-subscriptions',
+        'OPTIONS': {'MAX_ENTRIES': 10},
+    },
+}
+
+
+@override_settings(CACHES=CACHES)
+class SubscriptionCacheTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = seed_dataset(users=6, recipes=12, ingredients=20)
+        cls.user = cls.users[1]
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        caches['subscriptions'].clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def subscribed(self):
+        response = self.client.get('/api/users/?limit=50')
+        return {
+            user['id'] for user in response.data['results']
+            if user['is_subscribed']
+        }
+
+    def test_matches_database(self):
+        expected = set(
+            Subscribe.objects.filter(user=self.user)
+            .values_list('author_id', flat=True)
+        )
+        self.assertEqual(self.subscribed(), expected)
+
+    def test_cached_between_requests(self):
+        self.subscribed()
+        with self.assertNumQueries(3):
+            self.subscribed()
+
+    def test_invalidated_on_subscribe(self):
+        author = next(
+            user for user in self.users
+            if user != self.user and user.id not in self.subscribed()
+        )
+        self.client.post(f'/api/users/{author.id}/subscribe/')
+        self.assertIn(author.id, self.subscribed())
+        self.client.delete(f'/api/users/{author.id}/subscribe/')
+        self.assertNotIn(author.id, self.subscribed())
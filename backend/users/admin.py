@@ -37,6 +37,8 @@ class UserAdmin(ImportExportModelAdmin):
         'last_name',
         'is_staff',
         'date_joined',
+        'recipes_count',
+        'subscribers_count',
     )
     list_filter = ('username', 'email', 'first_name', 'last_name')
     search_fields = ('username', 'email', 'first_name', 'last_name')
@@ -45,6 +45,17 @@ class User(AbstractUser):
         },
     )
 
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Рецептов',
+        default=0,
+        editable=False,
+    )
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0,
+        editable=False,
+    )
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = (
         'username',
@@ -79,12 +90,14 @@ class Subscribe(models.Model):
         verbose_name='Подписчик',
         on_delete=models.CASCADE,
         related_name='subscriber',
+        db_index=False,
     )
     author = models.ForeignKey(
         User,
         verbose_name='Автор',
         on_delete=models.CASCADE,
         related_name='subscribed',
+        db_index=False,
     )
 
     class Meta:
@@ -103,6 +116,13 @@ class Subscribe(models.Model):
                 name='check_author',
             ),
         )
+        # unique_subscribe ведёт от подписчика, этот — от автора.
+        indexes = (
+            models.Index(
+                fields=('author', 'user'),
+                name='subscribe_author_user_idx',
+            ),
+        )
 
     def __str__(self):
         return f'{self.user} подписан на {self.author}'
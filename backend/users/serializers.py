@@ -1,10 +1,15 @@
+from django.db.transaction import atomic
 from django.shortcuts import get_object_or_404
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from drf_base64.fields import Base64ImageField
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
-from .models import User
+from .models import Subscribe, User
+from .subscriptions import invalidate, subscribed_author_ids
 from .validators import UsernameFieldValidator
+from api.fields import ImageVariantsField
+from recipes import counters, feed, relations
 from recipes.models import Recipe
 
 
@@ -54,7 +59,10 @@ class UserListSerializer(UserSerializer):
         user = self.context.get('request').user
         if user.is_anonymous:
             return None
-        return author.subscribed.filter(user=user).exists()
+        is_subscribed = getattr(author, 'is_subscribed', None)
+        if is_subscribed is not None:
+            return is_subscribed
+        return author.id in subscribed_author_ids(self.context['request'])
 
 
 class UserSetPasswordSerializer(serializers.Serializer):
@@ -68,10 +76,11 @@ class RecipeListShortSerializer(serializers.ModelSerializer):
     """Serializer to view a short recipe."""
 
     image = Base64ImageField(required=True)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
 
 
 class SubscriptionSerializer(serializers.Serializer):
@@ -90,7 +99,10 @@ class SubscriptionSerializer(serializers.Serializer):
         user = self.context.get('request').user
         if user.is_anonymous:
             return None
-        return author.subscribed.filter(user=user).exists()
+        is_subscribed = getattr(author, 'is_subscribed', None)
+        if is_subscribed is not None:
+            return is_subscribed
+        return author.id in subscribed_author_ids(self.context['request'])
 
     def get_recipes(self, author):
         request = self.context.get('request')
@@ -98,19 +110,18 @@ class SubscriptionSerializer(serializers.Serializer):
         if user.is_anonymous:
             return None
 
-        recipes = author.recipes.filter(author=author)
-        recipes_limit = request.query_params.get('recipes_limit')
-
-        if recipes_limit:
-            recipes = recipes[: int(recipes_limit)]
-        else:
-            recipes = recipes.all()
+        recipes = getattr(author, 'recipe_previews', None)
+        if recipes is None:
+            recipes = author.recipes.all()
+            recipes_limit = request.query_params.get('recipes_limit', '')
+            if recipes_limit.isdigit():
+                recipes = recipes[: int(recipes_limit)]
         return RecipeListShortSerializer(
             instance=recipes, many=True, context={'request': request}
         ).data
 
     def get_recipes_count(self, author):
-        return author.recipes.count()
+        return author.recipes_count
 
     class Meta:
         model = User
@@ -129,23 +140,26 @@ class SubscriptionSerializer(serializers.Serializer):
 class SubscribeSerializer(serializers.Serializer):
     """Serializer for adding and removing user subscriptions."""
 
-    def validate(self, data):
-        user = self.context.get('request').user
-        author = get_object_or_404(User, pk=self.context.get('id'))
-        if user == author:
-            raise serializers.ValidationError(
-                'Вы не можете подписаться на себя самого'
-            )
-        if author.subscribed.filter(user=user).exists():
-            raise serializers.ValidationError(
-                'Вы уже подписаны на этого пользователя'
-            )
-        return data
-
+    @atomic
     def create(self, validated_data):
         user = self.context.get('request').user
-        author = get_object_or_404(User, pk=validated_data.get('id'))
-        author.subscribed.create(user=user)
+        author_id = validated_data.get('id')
+        if not relations.insert_links(
+            Subscribe, user, 'author', User.objects.exclude(pk=user.pk),
+            (author_id,),
+        ):
+            author = get_object_or_404(User, pk=author_id)
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY:
+                    'Вы не можете подписаться на себя самого'
+                    if author == user
+                    else 'Вы уже подписаны на этого пользователя'
+            })
+        counters.subscribed(author_id)
+        feed.follow(user.id, author_id)
+        author = User.objects.get(pk=author_id)
+        author.is_subscribed = True
+        invalidate(self.context.get('request'))
         return SubscriptionSerializer(
             instance=author, context={'request': self.context.get('request')}
         ).data
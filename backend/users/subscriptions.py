@@ -0,0 +1,45 @@
+"""
+Cache of the author ids a user is subscribed to.
+
+The set is loaded with one query, memoized on the request and kept
+between requests in the ``settings.SUBSCRIPTION_CACHE`` cache, which
+expires entries after a short timeout. Subscribing and unsubscribing
+drop the user's entry; with several backend processes the cache must
+be shared (SUBSCRIPTION_CACHE_BACKEND / SUBSCRIPTION_CACHE_LOCATION),
+or the other processes keep the old entry until it expires.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Subscribe
+
+CACHE_KEY = 'subscribed-authors:{}'
+
+
+def get_cache():
+    return caches[settings.SUBSCRIPTION_CACHE]
+
+
+def subscribed_author_ids(request):
+    """Ids of the authors the current user is subscribed to."""
+    user = request.user
+    if user.is_anonymous:
+        return frozenset()
+    author_ids = getattr(request, '_subscribed_author_ids', None)
+    if author_ids is None:
+        key = CACHE_KEY.format(user.id)
+        author_ids = get_cache().get(key)
+        if author_ids is None:
+            author_ids = frozenset(
+                Subscribe.objects.filter(user=user)
+                .values_list('author_id', flat=True)
+            )
+            get_cache().set(key, author_ids)
+        request._subscribed_author_ids = author_ids
+    return author_ids
+
+
+def invalidate(request):
+    """Drops the cached subscriptions of the current user."""
+    get_cache().delete(CACHE_KEY.format(request.user.id))
+    request._subscribed_author_ids = None
@@ -1,10 +1,20 @@
-from django.shortcuts import get_object_or_404
+from collections import defaultdict
+
+from django.db.models import F, Value
+from django.db.models.expressions import Window
+from django.db.models.functions import RowNumber
+from django.db.transaction import atomic
+from django.http import Http404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from .models import Subscribe, User
+from api.serializers import BatchIdsSerializer
+from recipes import counters, feed, relations
+from recipes.models import Recipe
+from .subscriptions import invalidate
 from .serializers import (
     SubscribeSerializer,
     SubscriptionSerializer,
@@ -14,6 +24,34 @@ from .serializers import (
 )
 
 
+def prefetch_recipe_previews(authors, limit=None):
+    """
+    Loads the latest ``limit`` recipes of every author on the page
+    with a single ROW_NUMBER() OVER (PARTITION BY author) query.
+    """
+    recipes = Recipe.objects.filter(author__in=authors)
+    if limit is not None:
+        ranked = recipes.annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=F('author_id'),
+                order_by=(F('pub_date').desc(), F('id').desc()),
+            )
+        ).order_by()
+        sql, params = ranked.query.sql_with_params()
+        recipes = Recipe.objects.raw(
+            f'SELECT * FROM ({sql}) ranked WHERE ranked.row_number <= %s '
+            'ORDER BY ranked.author_id, ranked.row_number',
+            params + (limit,),
+        )
+    previews = defaultdict(list)
+    for recipe in recipes:
+        previews[recipe.author_id].append(recipe)
+    for author in authors:
+        author.recipe_previews = previews[author.id]
+    return authors
+
+
 class UserViewSet(
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
@@ -26,6 +64,7 @@ class UserViewSet(
     filter_backends = (DjangoFilterBackend, filters.SearchFilter)
     search_fields = ('email', 'username')
     filterset_fields = ('email', 'username')
+    cursor_ordering = ('id',)
 
     def get_permissions(self):
         """Defining access for the serializer action."""
@@ -37,6 +76,7 @@ class UserViewSet(
             'set_password': [permissions.IsAuthenticated()],
             'subscriptions': [permissions.IsAuthenticated()],
             'subscribe': [permissions.IsAuthenticated()],
+            'subscribe_batch': [permissions.IsAuthenticated()],
             'create': [permissions.AllowAny()],
         }
         return permissions_dict.get(
@@ -54,6 +94,7 @@ class UserViewSet(
             'set_password': UserSetPasswordSerializer,
             'subscriptions': SubscriptionSerializer,
             'subscribe': SubscribeSerializer,
+            'subscribe_batch': BatchIdsSerializer,
         }
         return serializer_class_dict.get(self.action)
 
@@ -94,8 +135,14 @@ class UserViewSet(
         """List of the user's subscriptions get."""
 
         user = request.user
-        subscribers = User.objects.filter(subscribed__user=user)
+        subscribers = User.objects.filter(subscribed__user=user).annotate(
+            is_subscribed=Value(True),
+        )
         page = self.paginate_queryset(subscribers)
+        recipes_limit = request.query_params.get('recipes_limit', '')
+        prefetch_recipe_previews(
+            page, int(recipes_limit) if recipes_limit.isdigit() else None
+        )
         serializer = self.get_serializer(
             instance=page, context={'request': request}, many=True
         )
@@ -115,7 +162,38 @@ class UserViewSet(
 
         elif self.request.method == 'DELETE':
             user = self.request.user
-            author = get_object_or_404(User, pk=pk)
-            subscribe = get_object_or_404(Subscribe, user=user, author=author)
-            subscribe.delete()
+            with atomic():
+                if not relations.delete_links(
+                    Subscribe, user, 'author', (pk,)
+                ):
+                    raise Http404
+                counters.subscribed(pk, -1)
+                feed.unfollow(user.id, pk)
+            invalidate(request)
             return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(['POST', 'DELETE'], detail=False, url_path='subscribe')
+    def subscribe_batch(self, request):
+        """Subscribing to and unsubscribing from several authors at once."""
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        user = request.user
+        authors = User.objects.exclude(pk=user.pk)
+        with atomic():
+            if request.method == 'POST':
+                results, changed = relations.link(
+                    Subscribe, user, 'author', authors, ids
+                )
+                counters.subscribed_many(changed)
+                feed.follow_many(user.id, changed)
+            else:
+                results, changed = relations.unlink(
+                    Subscribe, user, 'author', authors, ids
+                )
+                counters.subscribed_many(changed, -1)
+                feed.unfollow_many(user.id, changed)
+        if changed:
+            invalidate(request)
+        return Response({'results': results})